@@ -1,5 +1,6 @@
 """API route dependencies for JWT and session injection."""
 
+from datetime import date
 from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, status
@@ -36,6 +37,19 @@ def ensure_jwt_and_get_sub(jwt: Optional[dict]) -> str:
     return user_id
 
 
+def parse_date(value: Optional[str], name: str) -> Optional[date]:
+    """Parse an ISO date query parameter; malformed dates are a 400, not a 500."""
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name}: expected a date as YYYY-MM-DD",
+        )
+
+
 def verify_internal_secret(
     x_internal_secret: Optional[str], expected_secret: Optional[str]
 ) -> None:
@@ -0,0 +1,131 @@
+"""HTTP caching: conditional GETs and pre-serialized responses."""
+
+import gzip
+import hashlib
+import json
+import threading
+import weakref
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app import volumes
+
+# Responses smaller than this are not worth compressing.
+GZIP_MIN_SIZE = 1024
+# Per-snapshot cap on cached (endpoint, params) pairs, since range and filter
+# parameters are client controlled.
+MAX_ENTRIES = 512
+
+
+class CachedBody:
+    """The encoded JSON for one response, with its gzip form built on demand."""
+
+    __slots__ = ("body", "_gzipped")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._gzipped: bytes | None = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+# Entries live and die with the snapshot they were built from.
+_entries: "weakref.WeakKeyDictionary[volumes.Snapshot, dict[tuple, CachedBody]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def make_etag(*parts: Any) -> str:
+    """A weak ETag for a representation identified by the given parts."""
+    return 'W/"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:24] + '"'
+
+
+def volumes_etag(*parts: Any) -> str:
+    """ETag for data derived from the volumes files, plus any other inputs.
+
+    Uses the snapshot's content digest, so every worker agrees on it.
+    """
+    return make_etag("volumes", volumes.current().digest, *parts)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): the W/ prefix is ignored.
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def check_etag(request: Request, response: Response, etag: str) -> None:
+    """Answer 304 if the client already has this version, else tag the response.
+
+    Call it before doing the work for the response; the version must be read
+    before the data so a concurrent change can only make the ETag older than
+    the body, never newer.
+    """
+    if etag_matches(request, etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    response.headers["ETag"] = etag
+
+
+def encode_json(content: Any) -> bytes:
+    # Same encoding as fastapi's default JSONResponse.
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def request_key(request: Request) -> tuple:
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def cached_body(snapshot: volumes.Snapshot, key: tuple, build: Callable[[], Any]) -> CachedBody:
+    """Encoded JSON for key in a snapshot, building it on a miss."""
+    entries = _entries.get(snapshot)
+    if entries is not None and key in entries:
+        return entries[key]
+    with volumes.pinned(snapshot):
+        entry = CachedBody(encode_json(build()))
+    with _lock:
+        entries = _entries.setdefault(snapshot, {})
+        if len(entries) < MAX_ENTRIES:
+            entry = entries.setdefault(key, entry)
+    return entry
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def cached_response(request: Request, build: Callable[[], Any]) -> Response:
+    """Serve build()'s result as cached JSON bytes for the current snapshot.
+
+    build is only called on a miss, pinned to the snapshot the entry is
+    stored under, so a reload can never cache stale data under a new version.
+    A matching If-None-Match is answered with 304 before any of that.
+    """
+    snapshot = volumes.current()
+    etag = make_etag("volumes", snapshot.digest)
+    headers = {"Vary": "Accept-Encoding", "ETag": etag}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    entry = cached_body(snapshot, request_key(request), build)
+    if len(entry.body) >= GZIP_MIN_SIZE and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzipped(), media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
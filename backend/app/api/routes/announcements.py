@@ -3,33 +3,138 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.api.cache import check_etag, make_etag
+from app.database import data_version
 from app.domain.cardAnno.anno import (
+    ANNOUNCEMENT_FIELDS,
+    SUMMARY_FIELDS,
+    InvalidAudience,
+    defer_heavy,
     delete_announcement,
     edit_announcement,
+    fetch_announcement_changes,
+    fetch_announcement_feed,
+    fetch_announcement_page,
     fetch_user_announcements,
     get_announcement_by_ID,
+    get_announcement_content,
+    get_viewer,
     post_announcement,
 )
 from app.domain.user.auth import get_user_perms
-from app.models import Announcement
+from app.models import Announcement, User
 from app.schemas.types import AnnouncementCreate, AnnouncementUpdate
 
 router = APIRouter(prefix="/announcements", tags=["announcements"])
 
+MAX_PAGE_SIZE = 100
+
 
 @router.get("")
 def read_announcements(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
     query: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    """Fetch announcements visible to the user."""
-    ensure_jwt_and_get_sub(jwt)
-    announcement_ids = fetch_user_announcements(session, query)
-    return {"announcement_ids": announcement_ids}
+    """Fetch announcements visible to the user.
+
+    With a limit, returns one page ordered by priority then date, and a
+    next_cursor to pass back for the following page (null on the last one).
+    """
+    user_id = ensure_jwt_and_get_sub(jwt)
+    viewer = get_viewer(session, user_id)
+    check_etag(
+        request,
+        response,
+        make_etag("announcement", *data_version(session, Announcement), viewer),
+    )
+    if limit is None and cursor is None:
+        announcement_ids = fetch_user_announcements(session, query, viewer)
+        return {"announcement_ids": announcement_ids}
+    try:
+        announcement_ids, next_cursor = fetch_announcement_page(
+            session, query, limit or MAX_PAGE_SIZE, cursor, viewer
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"announcement_ids": announcement_ids, "next_cursor": next_cursor}
+
+
+@router.get("/feed")
+def read_announcement_feed(
+    jwt: JWTDep,
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    query: Optional[str] = None,
+    fields: Optional[list[str]] = Query(None),
+    summary: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Fetch announcements with author details in one request.
+
+    Pass fields (repeatable) to return only some of them, or summary=true for
+    everything but content. limit and cursor page through them like
+    GET /announcements.
+    """
+    user_id = ensure_jwt_and_get_sub(jwt)
+    if summary and fields is None:
+        fields = list(SUMMARY_FIELDS)
+    if fields is not None:
+        unknown = [field for field in fields if field not in ANNOUNCEMENT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+    viewer = get_viewer(session, user_id)
+    check_etag(
+        request,
+        response,
+        make_etag("announcement", *data_version(session, Announcement, User), viewer),
+    )
+    if limit is None and cursor is not None:
+        limit = MAX_PAGE_SIZE
+    try:
+        announcements, next_cursor = fetch_announcement_feed(
+            session, query, fields, limit, cursor, viewer
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"announcements": announcements, "next_cursor": next_cursor}
+
+
+@router.get("/changes")
+def read_announcement_changes(
+    jwt: JWTDep,
+    session: SessionDep,
+    since: int = Query(0, ge=0),
+    fields: Optional[list[str]] = Query(None),
+):
+    """Get announcements written or deleted after a change version.
+
+    Start with since=0 for everything, then pass back the returned version.
+    While more is true there are further changes to fetch right away.
+    """
+    user_id = ensure_jwt_and_get_sub(jwt)
+    if fields is not None:
+        unknown = [field for field in fields if field not in ANNOUNCEMENT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+    return fetch_announcement_changes(
+        session, since, fields, viewer=get_viewer(session, user_id)
+    )
 
 
 @router.get("/{announcement_id}")
@@ -37,10 +142,19 @@ def read_announcement(
     announcement_id: int,
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
 ):
     """Get a specific announcement by ID."""
-    ensure_jwt_and_get_sub(jwt)
-    announcement = get_announcement_by_ID(session, announcement_id)
+    user_id = ensure_jwt_and_get_sub(jwt)
+    viewer = get_viewer(session, user_id)
+    # The author's name and image come from the user table.
+    check_etag(
+        request,
+        response,
+        make_etag("announcement", *data_version(session, Announcement, User), viewer),
+    )
+    announcement = get_announcement_by_ID(session, announcement_id, viewer)
     if not announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Announcement not found"
@@ -48,6 +162,30 @@ def read_announcement(
     return {"announcement": announcement}
 
 
+@router.get("/{announcement_id}/content")
+def read_announcement_content(
+    announcement_id: int,
+    jwt: JWTDep,
+    session: SessionDep,
+    request: Request,
+    response: Response,
+):
+    """Get only the body of an announcement."""
+    user_id = ensure_jwt_and_get_sub(jwt)
+    viewer = get_viewer(session, user_id)
+    check_etag(
+        request,
+        response,
+        make_etag("announcement", *data_version(session, Announcement), viewer),
+    )
+    found, content = get_announcement_content(session, announcement_id, viewer)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Announcement not found"
+        )
+    return {"id": announcement_id, "content": content}
+
+
 @router.post("")
 def create_announcement(
     announcement_data: AnnouncementCreate,
@@ -70,16 +208,20 @@ def create_announcement(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Forbidden: You do not have permission to create announcements",
         )
-    new_announcement = post_announcement(
-        session=session,
-        title=announcement_data.title,
-        description=announcement_data.description,
-        content=announcement_data.content,
-        thumbnail=announcement_data.thumbnail,
-        author_id=user_id,
-        date=datetime.now().isoformat(),
-        priority=announcement_data.priority,
-    )
+    try:
+        new_announcement = post_announcement(
+            session=session,
+            title=announcement_data.title,
+            description=announcement_data.description,
+            content=announcement_data.content,
+            thumbnail=announcement_data.thumbnail,
+            author_id=user_id,
+            date=datetime.now().isoformat(),
+            priority=announcement_data.priority,
+            audience=announcement_data.audience,
+        )
+    except InvalidAudience as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     return {"announcement": new_announcement}
 
 
@@ -105,8 +247,8 @@ def update_announcement(
     """Update an announcement (author only)."""
     user_id = ensure_jwt_and_get_sub(jwt)
 
-    announcement = session.get(Announcement, announcement_id)
-    if not announcement:
+    announcement = session.get(Announcement, announcement_id, options=defer_heavy())
+    if not announcement or announcement.deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Announcement not found"
         )
@@ -116,16 +258,20 @@ def update_announcement(
             detail="Forbidden: You do not have permission to edit this announcement",
         )
 
-    updated_announcement = edit_announcement(
-        session=session,
-        announcement_id=announcement_id,
-        title=announcement_data.title,
-        description=announcement_data.description,
-        content=announcement_data.content,
-        thumbnail=announcement_data.thumbnail,
-        user_id=user_id,
-        priority=announcement_data.priority,
-    )
+    try:
+        updated_announcement = edit_announcement(
+            session=session,
+            announcement_id=announcement_id,
+            title=announcement_data.title,
+            description=announcement_data.description,
+            content=announcement_data.content,
+            thumbnail=announcement_data.thumbnail,
+            user_id=user_id,
+            priority=announcement_data.priority,
+            audience=announcement_data.audience,
+        )
+    except InvalidAudience as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     if not updated_announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Announcement not found"
@@ -2,17 +2,27 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from sqlmodel import Session
 
 from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub, verify_internal_secret
+from app.api.cache import check_etag, make_etag
 from app.config import INTERNAL_API_SECRET
-from app.database import get_session
+from app.database import data_version, get_session
 from app.domain.user.auth import (
     OAuthAccountConflict,
     get_user_perms,
     upsert_user_from_oauth,
 )
+from app.models import User
 from app.schemas.types import OAuthUpsertIn
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -51,8 +61,13 @@ def oauth_upsert(
 def read_permissions(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
 ):
     """Get user permissions based on their role and attributes."""
     user_id = ensure_jwt_and_get_sub(jwt)
+    check_etag(
+        request, response, make_etag("user", *data_version(session, User), user_id)
+    )
     permissions = get_user_perms(session, user_id)
     return {"permissions": permissions}
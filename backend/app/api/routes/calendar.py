@@ -1,15 +1,21 @@
 """Calendar and academic event routes."""
 
+from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub, parse_date
+from app.api.cache import cached_response, check_etag, volumes_etag
 from app.domain.schoolScheduler import (
+    academic_ical,
     get_academic_info,
     get_class,
     get_events,
     get_events_all,
+    month_range,
+    month_summary,
 )
 from app.models import User
 from app.schemas.types import Room
@@ -17,22 +23,87 @@ from app.schemas.types import Room
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
 
+def check_month(month: Optional[str]) -> None:
+    if month is None:
+        return
+    try:
+        month_range(month)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid month: expected YYYY-MM",
+        )
+
+
+def calendar_response(
+    events_for, start: Optional[date], end: Optional[date], month: Optional[str]
+):
+    """Build a calendar for a date range, or per-day counts for a month (YYYY-MM).
+
+    Parameters must already be validated, see check_month and parse_date.
+    """
+    if month is not None:
+        first, last = month_range(month)
+        calendar = get_academic_info([])
+        return {
+            "month": month,
+            "days": month_summary(events_for(first, last), month),
+            "start": calendar.start,
+            "end": calendar.end,
+        }
+    return get_academic_info(events_for(start, end)).convert()
+
+
 @router.get("/academic")
 def get_school_academic_calendar(
     jwt: JWTDep,
+    request: Request,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    month: Optional[str] = None,
 ):
-    """Get the school-wide academic calendar with all events."""
+    """Get the school-wide academic calendar, optionally limited to a date range
+    or summarized per day for a month."""
     ensure_jwt_and_get_sub(jwt)
-    return get_academic_info(get_events_all()).convert()
+    check_month(month)
+    start_date, end_date = parse_date(start, "from"), parse_date(end, "to")
+    return cached_response(
+        request, lambda: calendar_response(get_events_all, start_date, end_date, month)
+    )
+
+
+@router.get("/academic.ics")
+def get_school_academic_ical(request: Request, response: Response):
+    """Stream the school-wide academic calendar as iCalendar.
+
+    Public so calendar apps can subscribe to it without the session JWT.
+    """
+    etag = volumes_etag()
+    check_etag(request, response, etag)
+    return StreamingResponse(
+        academic_ical(),
+        media_type="text/calendar",
+        headers={
+            "Content-Disposition": 'inline; filename="academic.ics"',
+            "Cache-Control": "public, max-age=3600",
+            "ETag": etag,
+        },
+    )
 
 
 @router.get("/personal")
 def get_personal_calendar(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
     class_: Optional[str] = None,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+    month: Optional[str] = None,
 ):
-    """Get the user's personal calendar based on their class assignment."""
+    """Get the user's personal calendar based on their class assignment,
+    optionally limited to a date range or summarized per day for a month."""
     user_id = ensure_jwt_and_get_sub(jwt)
     user = session.get(User, user_id)
     if user is None:
@@ -44,7 +115,11 @@ def get_personal_calendar(
             class_ = "C2R1"
         else:
             class_ = "C2R1" if user.class_ is None else user.class_
+    check_month(month)
+    start_date, end_date = parse_date(start, "from"), parse_date(end, "to")
+    check_etag(request, response, volumes_etag(class_))
     f_class = get_class(class_)
-    return get_academic_info(
-        get_events(Room(f_class["year"], f_class["department"], class_))
-    ).convert()
+    room = Room(f_class["year"], f_class["department"], class_)
+    return calendar_response(
+        lambda first, last: get_events(room, first, last), start_date, end_date, month
+    )
@@ -0,0 +1,52 @@
+"""Server-Sent Events routes."""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app import events
+from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.domain.cardAnno.anno import Viewer, get_viewer, sees_event
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Comment lines keep proxies from closing idle connections.
+KEEPALIVE_SECONDS = 15
+# Only used to pick the subscribers an event goes to.
+ROUTING_FIELDS = ("audience", "author_id")
+
+
+async def event_stream(request: Request, viewer: Viewer) -> AsyncIterator[str]:
+    queue = events.broadcaster.subscribe(lambda event: sees_event(viewer, event))
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            data = {key: value for key, value in event.items() if key not in ROUTING_FIELDS}
+            yield f"event: {event['type']}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        events.broadcaster.unsubscribe(queue)
+
+
+@router.get("")
+async def stream_events(jwt: JWTDep, session: SessionDep, request: Request):
+    """Stream announcement and schedule changes as Server-Sent Events.
+
+    Event types are announcement (action, id, version), schedule (version)
+    and resync, sent when the client may have missed events and should
+    refetch. Announcement events only reach users the announcement is for.
+    """
+    user_id = ensure_jwt_and_get_sub(jwt)
+    viewer = get_viewer(session, user_id)
+    return StreamingResponse(
+        event_stream(request, viewer),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,68 @@
+"""Uploaded image routes."""
+
+from fastapi import APIRouter, HTTPException, UploadFile, status
+from fastapi.responses import FileResponse
+
+from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.domain.media import (
+    BlobTooLarge,
+    UnsupportedBlobType,
+    blob_path,
+    media_type,
+    store_blob,
+)
+from app.domain.user.auth import get_user_perms
+from app.schemas.types import RoleEnum
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+def upload_media(
+    file: UploadFile,
+    jwt: JWTDep,
+    session: SessionDep,
+):
+    """Upload an image for an announcement (admin/teacher only)."""
+    user_id = ensure_jwt_and_get_sub(jwt)
+    permissions = get_user_perms(session, user_id)
+    if permissions is None or permissions.get("role") not in [
+        RoleEnum.ADMIN,
+        RoleEnum.TEACHER,
+    ]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Forbidden: You do not have permission to upload images",
+        )
+    try:
+        name = store_blob(file.file)
+    except BlobTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+        )
+    except UnsupportedBlobType as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc)
+        )
+    return {"name": name, "url": f"{router.prefix}/{name}"}
+
+
+@router.get("/{name}")
+def read_media(name: str):
+    """Serve an uploaded image.
+
+    Public so <img> tags and caches can fetch it. Names are content hashes,
+    so a name always refers to the same bytes and can be cached forever.
+    Range requests are handled by FileResponse.
+    """
+    path = blob_path(name)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return FileResponse(
+        path,
+        media_type=media_type(name),
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{name.split(".")[0]}"',
+        },
+    )
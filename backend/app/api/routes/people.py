@@ -2,83 +2,97 @@
 
 from typing import Optional
 
-from fastapi import APIRouter
-from sqlmodel import select
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.api.cache import cached_response, check_etag, make_etag
+from app.database import data_version
+from app.domain.user import search_people
 from app.models import User
-from app.schemas.types import CLASSES_LOOKUP, GRADE_LOOKUP
+from app.schemas.types import load_info
 
 router = APIRouter(prefix="/people", tags=["people"])
 
+MAX_PAGE_SIZE = 100
+
 
 @router.get("")
 def get_people(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
     grade: Optional[int] = None,
     department: Optional[str] = None,
     class_: Optional[str] = None,
     search: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    """Get list of people filtered by grade, department, and/or class."""
+    """Get list of people filtered by grade, department, and/or class.
+
+    search ranks the best matches on name or personnel ID first. With a
+    limit, returns one page and a next_cursor for the following one.
+    """
     ensure_jwt_and_get_sub(jwt)
-    executed_query = (
-        select(User)
-        .where(User.year == grade if grade is not None else True)
-        .where(User.department == department if department is not None else True)
-        .where(User.class_ == class_ if class_ is not None else True)
-        .where(
-            (User.name.ilike(f"%{search}%") | User.personnelID.ilike(f"%{search}%"))  # type: ignore
-            if search is not None
-            else True
+    check_etag(request, response, make_etag("user", *data_version(session, User)))
+    if limit is None and cursor is not None:
+        limit = MAX_PAGE_SIZE
+    try:
+        users_data, next_cursor = search_people(
+            session, search, grade, department, class_, limit, cursor
         )
-    )
-    users = session.exec(executed_query).all()
-    users_data = [x.model_dump() for x in users]
-    return {"users": users_data}
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"users": users_data, "next_cursor": next_cursor}
 
 
 @router.get("/grades")
-def get_grades(jwt: JWTDep):
+def get_grades(jwt: JWTDep, request: Request):
     """Get available grade levels."""
     ensure_jwt_and_get_sub(jwt)
-    return {"grades": GRADE_LOOKUP}
+    return cached_response(request, lambda: {"grades": load_info()["grades"]})
 
 
 @router.get("/classes")
 def get_classes(
     jwt: JWTDep,
+    request: Request,
     grade: Optional[int] = None,
     department: Optional[str] = None,
 ):
     """Get available classes filtered by grade and/or department."""
     ensure_jwt_and_get_sub(jwt)
+    return cached_response(request, lambda: filter_classes(grade, department))
+
+
+def filter_classes(grade: Optional[int], department: Optional[str]) -> dict:
+    classes_lookup = load_info()["classes"]
     if department is None and grade is None:
         classes = [
             class_item
-            for grade_classes in CLASSES_LOOKUP.values()
+            for grade_classes in classes_lookup.values()
             for dep, classes_list in grade_classes.items()
             for class_item in classes_list
         ]
     elif department is None:
         classes = [
             class_item
-            for dep, classes_list in CLASSES_LOOKUP.get(
+            for dep, classes_list in classes_lookup.get(
                 grade if grade is not None else 1, {}
             ).items()
             for class_item in classes_list
         ]
     elif grade is None:
         classes = []
-        for grade_classes in CLASSES_LOOKUP.values():
+        for grade_classes in classes_lookup.values():
             for dep in grade_classes.keys():
                 if dep == department:
                     classes.extend(grade_classes[dep])
     else:
         classes = [
             class_item
-            for dep, classes_list in CLASSES_LOOKUP.get(grade, {}).items()
+            for dep, classes_list in classes_lookup.get(grade, {}).items()
             if dep == department
             for class_item in classes_list
         ]
@@ -2,8 +2,9 @@
 
 from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
+from app.api.cache import cached_response, check_etag, volumes_etag
 from app.domain.resources import load_resources
 
 router = APIRouter(prefix="/resources", tags=["resources"])
@@ -11,10 +12,13 @@ router = APIRouter(prefix="/resources", tags=["resources"])
 
 @router.get("")
 def get_resources(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     category: Optional[str] = None,
 ):
     """Get available school resources."""
+    check_etag(request, response, volumes_etag())
     resources = load_resources()
     if search is not None:
         resources = [
@@ -30,8 +34,12 @@ def get_resources(
 
 
 @router.get("/categories")
-def get_resource_categories():
+def get_resource_categories(request: Request):
     """Get available resource categories."""
+    return cached_response(request, resource_categories)
+
+
+def resource_categories() -> dict:
     resources = load_resources()
     categories = set(
         category for resource in resources for category in resource["categories"]
@@ -1,16 +1,28 @@
 """Timetable and schedule routes."""
 
+import json
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub
+from app.api import JWTDep, SessionDep, ensure_jwt_and_get_sub, parse_date
+from app.api.cache import cached_response, check_etag, volumes_etag
 from app.domain.schoolScheduler import (
+    find_conflicts,
+    find_free_rooms,
     fixed_week_schedule,
     get_class,
     get_slots,
+    has_timetable,
+    list_classes,
+    range_schedule,
+    room_week,
+    subject_week,
+    timetable_ical,
     week_schedule,
+    week_schedules,
 )
 from app.models import User
 from app.schemas.types import Room
@@ -19,15 +31,17 @@ router = APIRouter(prefix="/schedule", tags=["schedule"])
 
 
 @router.get("/slots")
-def get_slots_endpoint():
+def get_slots_endpoint(request: Request):
     """Get all available time slots for the school."""
-    return {"slots": get_slots()}
+    return cached_response(request, lambda: {"slots": get_slots()})
 
 
 @router.get("/timetable")
 def get_school_timetable(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
     class_: Optional[str] = None,
 ):
     """Get the timetable for a specific class."""
@@ -38,6 +52,7 @@ def get_school_timetable(
             class_ = "C2R1"
         else:
             class_ = "C2R1" if user.class_ is None else user.class_
+    check_etag(request, response, volumes_etag(class_))
     f_class = get_class(class_)
     return {
         "timetable": fixed_week_schedule(
@@ -50,6 +65,8 @@ def get_school_timetable(
 def get_dated_timetable(
     jwt: JWTDep,
     session: SessionDep,
+    request: Request,
+    response: Response,
     when: Optional[str] = None,
     class_: Optional[str] = None,
 ):
@@ -66,6 +83,7 @@ def get_dated_timetable(
             class_ = "C2R1"
         else:
             class_ = "C2R1" if user.class_ is None else user.class_
+    check_etag(request, response, volumes_etag(class_))
     f_class = get_class(class_)
     return {
         "timetable": week_schedule(
@@ -73,3 +91,201 @@ def get_dated_timetable(
             date.fromisoformat(when),
         )
     }
+
+
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/timetable/range")
+def get_range_timetable(
+    jwt: JWTDep,
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    start: str = Query(..., alias="from"),
+    end: str = Query(..., alias="to"),
+    class_: Optional[str] = None,
+    stream: bool = False,
+):
+    """Get the timetable for every school day in a date range.
+
+    With stream=true the days are sent one per line as NDJSON.
+    """
+    start_date = parse_date(start, "from")
+    end_date = parse_date(end, "to")
+    assert start_date is not None and end_date is not None
+    if not 0 <= (end_date - start_date).days < MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be between 1 and {MAX_RANGE_DAYS} days",
+        )
+    user_id = ensure_jwt_and_get_sub(jwt)
+    user = session.get(User, user_id)
+    if not class_:
+        if user is None:
+            class_ = "C2R1"
+        else:
+            class_ = "C2R1" if user.class_ is None else user.class_
+    etag = volumes_etag(class_)
+    check_etag(request, response, etag)
+    f_class = get_class(class_)
+    days = range_schedule(
+        Room(f_class["year"], f_class["department"], class_), start_date, end_date
+    )
+    if stream:
+        return StreamingResponse(
+            (
+                json.dumps(
+                    {"date": day.isoformat(), "timetable": timetable, "actions": actions}
+                )
+                + "\n"
+                for day, timetable, actions in days
+            ),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag},
+        )
+    return {
+        "days": [
+            {"date": day, "timetable": timetable, "actions": actions}
+            for day, timetable, actions in days
+        ]
+    }
+
+
+@router.get("/timetable/bulk")
+def get_bulk_timetable(
+    jwt: JWTDep,
+    request: Request,
+    response: Response,
+    classes: Optional[list[str]] = Query(None),
+    grade: Optional[int] = None,
+    department: Optional[str] = None,
+    when: Optional[str] = None,
+):
+    """Get the week timetable for many classes, a grade or a department at once."""
+    ensure_jwt_and_get_sub(jwt)
+    when_date = parse_date(when, "when")
+    check_etag(request, response, volumes_etag())
+    if not classes:
+        classes = [x for x in list_classes(grade, department) if has_timetable(x)]
+    rooms = []
+    for class_ in classes:
+        f_class = get_class(class_)
+        if not f_class or not has_timetable(class_):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Class {class_} not found",
+            )
+        rooms.append(Room(f_class["year"], f_class["department"], class_))
+    return {"timetables": week_schedules(rooms, when_date)}
+
+
+@router.get("/timetable/{class_}.ics")
+def get_timetable_ical(class_: str, request: Request, response: Response):
+    """Stream a class's timetable and events for the academic year as iCalendar.
+
+    Public like /slots, since calendar apps subscribing to the feed cannot send
+    the session JWT.
+    """
+    f_class = get_class(class_)
+    if not f_class or not has_timetable(class_):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Class not found"
+        )
+    etag = volumes_etag()
+    check_etag(request, response, etag)
+    return StreamingResponse(
+        timetable_ical(Room(f_class["year"], f_class["department"], class_)),
+        media_type="text/calendar",
+        headers={
+            "Content-Disposition": f'inline; filename="{class_}.ics"',
+            "Cache-Control": "public, max-age=3600",
+            "ETag": etag,
+        },
+    )
+
+
+@router.get("/rooms/free")
+def get_free_rooms(
+    jwt: JWTDep,
+    request: Request,
+    response: Response,
+    slots: list[str] = Query(...),
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+):
+    """Get rooms with none of the given slots booked on any day of a date range."""
+    ensure_jwt_and_get_sub(jwt)
+    start_date = parse_date(start, "from")
+    end_date = parse_date(end, "to")
+    if (
+        start_date is not None
+        and end_date is not None
+        and not 0 <= (end_date - start_date).days < MAX_RANGE_DAYS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be between 1 and {MAX_RANGE_DAYS} days",
+        )
+    check_etag(request, response, volumes_etag())
+    try:
+        rooms = find_free_rooms(slots, start_date, end_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"rooms": rooms}
+
+
+@router.get("/conflicts")
+def get_room_conflicts(
+    jwt: JWTDep,
+    request: Request,
+    response: Response,
+    start: Optional[str] = Query(None, alias="from"),
+    end: Optional[str] = Query(None, alias="to"),
+):
+    """Get rooms double-booked by two classes in a date range, after overrides."""
+    ensure_jwt_and_get_sub(jwt)
+    check_etag(request, response, volumes_etag())
+    try:
+        conflicts = find_conflicts(parse_date(start, "from"), parse_date(end, "to"))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"conflicts": conflicts}
+
+
+@router.get("/rooms/{room}")
+def get_room_occupancy(
+    room: str,
+    jwt: JWTDep,
+    request: Request,
+    response: Response,
+    when: Optional[str] = None,
+):
+    """Get which classes use a room during the week of a date."""
+    ensure_jwt_and_get_sub(jwt)
+    check_etag(request, response, volumes_etag())
+    occupancy = room_week(room, parse_date(when, "when"))
+    if occupancy is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Room not found"
+        )
+    return {"room": room, "occupancy": occupancy}
+
+
+@router.get("/subjects/{subject_id}")
+def get_subject_occupancy(
+    subject_id: str,
+    jwt: JWTDep,
+    request: Request,
+    response: Response,
+    when: Optional[str] = None,
+):
+    """Get which classes take a subject, and where, during the week of a date."""
+    ensure_jwt_and_get_sub(jwt)
+    check_etag(request, response, volumes_etag())
+    occupancy = subject_week(subject_id, parse_date(when, "when"))
+    if occupancy is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Subject not found"
+        )
+    return {"subject": subject_id, "occupancy": occupancy}
@@ -2,6 +2,7 @@
 
 import logging
 from os import getenv
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -52,3 +53,14 @@ if DB_URL.startswith("sqlite"):
 
 # Encryption
 ENCRYPTION_KEY = getenv("ENCRYPTION_KEY")
+
+# Uploaded images, stored by content hash. Unset or empty (as in .env.example)
+# is the blobs directory the compose file mounts.
+BLOBS_DIR = Path(getenv("BLOBS_DIR") or "blobs")
+
+# Server-Sent Events fan-out: "postgres" shares events between workers via
+# LISTEN/NOTIFY, "memory" keeps them within one process. Unset or empty (as
+# in .env.example) picks by database.
+EVENTS_BACKEND = getenv("EVENTS_BACKEND") or (
+    "postgres" if DB_URL.startswith("postgresql") else "memory"
+)
@@ -1,25 +1,128 @@
 """Database initialization and session management."""
 
 import logging
+from itertools import chain
 from typing import Generator
 
+from sqlalchemy import event, insert, inspect, update
 from sqlmodel import Session as SQLSession
-from sqlmodel import SQLModel, create_engine
+from sqlmodel import SQLModel, create_engine, select
 
+from app import events, migrations
 from app.config import CONNECT_ARGS, DB_URL
+from app.domain.common import audience_key, str_to_tags
+from app.models import Announcement, DataVersion, User
 
 logger = logging.getLogger("uvicorn.error")
 
 # Initialize database engine
 engine = create_engine(DB_URL, connect_args=CONNECT_ARGS)
 
+# Tables whose writes bump their DataVersion row, for conditional GETs.
+VERSIONED_MODELS = (Announcement, User)
+
 
 def create_db_and_tables():
-    """Create all database tables on startup."""
+    """Create all database tables and apply pending migrations on startup."""
     SQLModel.metadata.create_all(engine)
+    migrations.migrate(engine)
     logger.info("Database tables created/verified.")
 
 
+@event.listens_for(SQLSession, "before_flush")
+def bump_data_versions(session, flush_context, instances):
+    """Bump the version of every tracked table this flush writes to.
+
+    Written announcements are stamped with the new version. The counter row
+    stays locked until commit, so versions become visible in order.
+    """
+    changed: dict[str, list] = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, VERSIONED_MODELS) and (
+            obj not in session.dirty or session.is_modified(obj)
+        ):
+            changed.setdefault(obj.__tablename__, []).append(obj)
+    connection = session.connection()
+    for table_name in sorted(changed):
+        version = connection.execute(
+            update(DataVersion)
+            .where(DataVersion.table_name == table_name)  # type: ignore
+            .values(version=DataVersion.version + 1)
+            .returning(DataVersion.version)
+        ).scalar()
+        if version is None:
+            version = 1
+            connection.execute(insert(DataVersion).values(table_name=table_name, version=1))
+        for obj in changed[table_name]:
+            if isinstance(obj, Announcement):
+                obj.change_version = version
+                action = (
+                    "created" if obj in session.new
+                    else "deleted" if obj.deleted
+                    else "updated"
+                )
+                session.info.setdefault("flushed_announcements", []).append(
+                    (obj, action, audience_keys(obj))
+                )
+
+
+def audience_keys(announcement: Announcement) -> list[str] | None:
+    """Audience keys of an announcement before and after this flush.
+
+    Viewers an edit takes the announcement away from still hear about it.
+    None, for everyone, if it had no audience or the audience is not loaded.
+    """
+    history = inspect(announcement).attrs.audience.history
+    values = list(chain(history.added, history.unchanged, history.deleted))
+    if not values or None in values:
+        return None
+    return sorted({audience_key(group) for value in values for group in str_to_tags(value)})
+
+
+@event.listens_for(SQLSession, "after_flush")
+def collect_change_events(session, flush_context):
+    # Ids of new rows only exist after the flush, and attributes are expired
+    # after the commit, so events are built here and sent in after_commit.
+    # The audience and author only decide who the event is sent to, see
+    # sees_event.
+    for obj, action, audience in session.info.pop("flushed_announcements", []):
+        session.info.setdefault("pending_events", []).append(
+            {
+                "type": "announcement",
+                "action": action,
+                "id": obj.id,
+                "version": obj.change_version,
+                "audience": audience,
+                "author_id": obj.author_id,
+            }
+        )
+
+
+@event.listens_for(SQLSession, "after_commit")
+def publish_change_events(session):
+    for change in session.info.pop("pending_events", []):
+        events.publish(change)
+
+
+@event.listens_for(SQLSession, "after_rollback")
+def discard_change_events(session):
+    session.info.pop("flushed_announcements", None)
+    session.info.pop("pending_events", None)
+
+
+def data_version(session: SQLSession, *models: type[SQLModel]) -> tuple[int, ...]:
+    """Current change counters of the given tracked tables."""
+    names = [model.__tablename__ for model in models]
+    versions = dict(
+        session.exec(
+            select(DataVersion.table_name, DataVersion.version).where(
+                DataVersion.table_name.in_(names)  # type: ignore
+            )
+        ).all()
+    )
+    return tuple(versions.get(name, 0) for name in names)
+
+
 def get_session() -> Generator[SQLSession, None, None]:
     """Dependency to provide database session to routes."""
     with SQLSession(engine) as session:
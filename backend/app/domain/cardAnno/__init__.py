@@ -1,8 +1,19 @@
 from app.domain.cardAnno.anno import (
+    ANNOUNCEMENT_FIELDS,  # noqa : F401
+    SUMMARY_FIELDS,  # noqa : F401
+    InvalidAudience,  # noqa : F401
+    Viewer,  # noqa : F401
+    defer_heavy,  # noqa : F401
     delete_announcement,  # noqa : F401
     edit_announcement,  # noqa : F401
+    fetch_announcement_changes,  # noqa : F401
+    fetch_announcement_feed,  # noqa : F401
+    fetch_announcement_page,  # noqa : F401
     fetch_user_announcements,  # noqa : F401
     get_announcement_by_ID,  # noqa : F401
+    get_announcement_content,  # noqa : F401
+    get_viewer,  # noqa : F401
     post_announcement,  # noqa : F401
 )
+from app.domain.cardAnno.search import search_announcements  # noqa : F401
 from app.models import Announcement  # noqa : F401
@@ -1,30 +1,308 @@
+import json
+from dataclasses import dataclass, fields
+from typing import Any
+
+from sqlalchemy import Connection, and_, delete, func, inspect, or_, text, true, update
+from sqlalchemy.orm import defer
 from sqlmodel import Session, select
 
-from app.schemas.types import AnnouncementReturn
-from app.models import Announcement, User
+from app.domain.cardAnno.search import content_text, search_announcements
+from app.domain.common import (
+    Room,
+    audience_key,
+    decode_cursor,
+    encode_cursor,
+    tags_to_str,
+    viewer_keys,
+)
+from app.domain.media import externalize_content, externalize_thumbnail
+from app.domain.schoolScheduler.loader import load_audience_tags
+from app.domain.schoolScheduler.timetable import get_class
+from app.schemas.types import AnnouncementReturn, RoleEnum
+from app.models import Announcement, AnnouncementAudience, DataVersion, User
+
+ANNOUNCEMENT_FIELDS = tuple(field.name for field in fields(AnnouncementReturn))
+# What list views need: everything but the rich-text body.
+SUMMARY_FIELDS = tuple(name for name in ANNOUNCEMENT_FIELDS if name != "content")
+# Columns that can be megabytes per row (Tiptap JSON, inline images) and are
+# only loaded when a caller actually needs them.
+HEAVY_COLUMNS = (Announcement.content, Announcement.thumbnail, Announcement.search_text)
+# Deleted announcements are kept as tombstones for /changes; every other read
+# filters them out.
+LIVE = Announcement.deleted == False  # noqa: E712
+MAX_CHANGES = 500
+# Paged listings: most important first (priority 1), then newest first.
+# Backed by the ix_announcement_feed_order index.
+PAGE_ORDER = (
+    Announcement.priority.asc(),  # pyright: ignore[reportAttributeAccessIssue]
+    Announcement.date.desc(),  # pyright: ignore[reportAttributeAccessIssue]
+    Announcement.id.desc(),  # pyright: ignore[reportOptionalMemberAccess]
+)
+EVERYONE = [["all-classes"]]
+
+
+class InvalidAudience(Exception):
+    pass
+
+
+@dataclass
+class Viewer:
+    """Who is reading. keys are their viewer_keys, or None to see everything."""
+
+    user_id: str | None
+    keys: list[str] | None
+
+
+def get_viewer(session: Session, user_id: str) -> Viewer:
+    """Staff see every announcement; everyone else sees what targets their class.
+
+    Users without a class only see announcements for all classes.
+    """
+    user = session.get(User, user_id)
+    if user is None:
+        return Viewer(user_id, viewer_keys([]))
+    if user.role in (RoleEnum.ADMIN, RoleEnum.TEACHER):
+        return Viewer(user_id, None)
+    f_class = get_class(user.class_) if user.class_ else {}
+    if not f_class:
+        return Viewer(user_id, viewer_keys([]))
+    room = Room(f_class["year"], f_class["department"], user.class_)  # type: ignore
+    return Viewer(user_id, viewer_keys(room.toTag()))
+
+
+def visible_to(viewer: Viewer | None) -> list[Any]:
+    """Where clauses limiting announcements to what viewer may see.
+
+    Authors always see their own. No viewer means no limit, for scripts.
+    """
+    if viewer is None or viewer.keys is None:
+        return []
+    return [
+        or_(
+            Announcement.audience == None,  # noqa: E711
+            Announcement.author_id == viewer.user_id,
+            select(AnnouncementAudience.announcement_id)
+            .where(
+                AnnouncementAudience.announcement_id == Announcement.id,
+                AnnouncementAudience.tag.in_(viewer.keys),  # type: ignore
+            )
+            .exists(),
+        )
+    ]
+
+
+def sees_event(viewer: Viewer, event: dict[str, Any]) -> bool:
+    """Whether viewer may hear about an event, with the same rules as visible_to.
+
+    Announcement events carry the audience keys of the announcement (None for
+    everyone) and its author_id; other events reach everyone.
+    """
+    if viewer.keys is None or event.get("type") != "announcement":
+        return True
+    audience = event.get("audience")
+    return (
+        audience is None
+        or event.get("author_id") == viewer.user_id
+        or not set(audience).isdisjoint(viewer.keys)
+    )
+
+
+def validate_audience(audience: list[list[str]]) -> None:
+    """Raise InvalidAudience unless every group is non-empty and uses known tags.
+
+    A typo like "C2R1" for "class-C2R1" would otherwise hide a post from
+    every student.
+    """
+    if not audience or not all(audience):
+        raise InvalidAudience("Audience groups must not be empty")
+    known = load_audience_tags()
+    unknown = sorted({tag for group in audience for tag in group} - known)
+    if unknown:
+        raise InvalidAudience(f"Unknown audience tags: {', '.join(unknown)}")
+
+
+def set_audience(
+    session: Session, announcement: Announcement, audience: list[list[str]]
+) -> None:
+    """Store an announcement's audience and rebuild its visibility index rows."""
+    validate_audience(audience)
+    groups = [sorted(set(group)) for group in audience]
+    announcement.audience = tags_to_str(groups)  # type: ignore
+    session.add(announcement)
+    if announcement.id is None:
+        session.flush()
+    session.exec(
+        delete(AnnouncementAudience).where(
+            AnnouncementAudience.announcement_id == announcement.id  # type: ignore
+        )
+    )
+    session.add_all(
+        AnnouncementAudience(tag=tag, announcement_id=announcement.id)  # type: ignore
+        for tag in {audience_key(group) for group in groups}
+    )
+
+
+def announcement_values(row: Any, names: list[str] | tuple[str, ...]) -> dict[str, Any]:
+    values = {name: row._mapping[name] for name in names}
+    if "audience" in values:
+        audience = values["audience"]
+        values["audience"] = EVERYONE if audience is None else json.loads(audience)
+    return values
 
 
 def fetch_user_announcements(
-    session: Session, query: str | None = None
+    session: Session, query: str | None = None, viewer: Viewer | None = None
 ) -> list[int | None]:
     if query is not None:
         query = query.strip()
+    if query:
+        return list(search_announcements(session, query, filters=visible_to(viewer)))
 
     statement = (
-        select(Announcement).order_by(Announcement.date.desc())  # pyright: ignore[reportAttributeAccessIssue]
+        select(Announcement.id)
+        .where(LIVE, *visible_to(viewer))
+        .order_by(Announcement.date.desc())  # pyright: ignore[reportAttributeAccessIssue]
     )
-    announcements = session.exec(statement).all()
-    filtered = [
-        announcement
-        for announcement in announcements
-        if (
-            query is None
-            or query.lower() in announcement.title.lower()
-            or query.lower() in announcement.description.lower()
+    announcement_ids = list(session.exec(statement).all())
+    return announcement_ids
+
+
+def defer_heavy() -> list[Any]:
+    """Loader options for ORM queries that do not touch HEAVY_COLUMNS."""
+    return [defer(column) for column in HEAVY_COLUMNS]  # type: ignore
+
+
+def search_page(
+    session: Session,
+    query: str,
+    limit: int,
+    cursor: str | None,
+    viewer: Viewer | None = None,
+) -> tuple[list[int], str | None]:
+    """One page of ranked search results; the cursor holds the offset."""
+    offset = 0 if cursor is None else decode_cursor(cursor, int)[0]
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    ids = search_announcements(session, query, limit + 1, offset, visible_to(viewer))
+    if len(ids) <= limit:
+        return ids, None
+    return ids[:limit], encode_cursor(offset + limit)
+
+
+def paginate(statement, limit: int, cursor: str | None):
+    """Order by PAGE_ORDER and fetch one row past the page to detect the end."""
+    statement = statement.order_by(*PAGE_ORDER)
+    if cursor is not None:
+        priority, date, announcement_id = decode_cursor(cursor, int, str, int)
+        # Row comparison spelled out, since the sort directions are mixed.
+        statement = statement.where(
+            or_(
+                Announcement.priority > priority,
+                and_(
+                    Announcement.priority == priority,
+                    or_(
+                        Announcement.date < date,
+                        and_(Announcement.date == date, Announcement.id < announcement_id),  # type: ignore
+                    ),
+                ),
+            )
         )
+    return statement.limit(limit + 1)
+
+
+def next_page(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.page_priority, last.page_date, last.page_id)
+
+
+def page_keys() -> list[Any]:
+    return [
+        Announcement.priority.label("page_priority"),  # pyright: ignore[reportAttributeAccessIssue]
+        Announcement.date.label("page_date"),  # pyright: ignore[reportAttributeAccessIssue]
+        Announcement.id.label("page_id"),  # pyright: ignore[reportOptionalMemberAccess]
     ]
-    announcement_ids = [announcement.id for announcement in filtered]
-    return announcement_ids
+
+
+def fetch_announcement_page(
+    session: Session,
+    query: str | None,
+    limit: int,
+    cursor: str | None = None,
+    viewer: Viewer | None = None,
+) -> tuple[list[int], str | None]:
+    """One page of announcement ids and the cursor for the next one, if any.
+
+    Searches are ordered by relevance instead of PAGE_ORDER.
+    """
+    if query is not None and query.strip():
+        return search_page(session, query.strip(), limit, cursor, viewer)
+    statement = paginate(
+        select(*page_keys()).where(LIVE, *visible_to(viewer)), limit, cursor
+    )
+    rows, nextCursor = next_page(list(session.exec(statement).all()), limit)
+    return [row.page_id for row in rows], nextCursor
+
+
+def announcement_columns() -> dict[str, Any]:
+    return {
+        "id": Announcement.id,
+        "title": Announcement.title,
+        "description": Announcement.description,
+        "content": Announcement.content,
+        "thumbnail": Announcement.thumbnail,
+        "author_id": Announcement.author_id,
+        "authorName": User.name,
+        "authorImage": User.image,
+        "date": Announcement.date,
+        "priority": Announcement.priority,
+        "audience": Announcement.audience,
+    }
+
+
+def fetch_announcement_feed(
+    session: Session,
+    query: str | None = None,
+    selected: list[str] | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+    viewer: Viewer | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Announcements with their author's name and image in one joined query.
+
+    selected limits the AnnouncementReturn fields that are loaded and
+    returned, so list views can leave out content. With a limit, returns one
+    page in PAGE_ORDER (or by relevance, when searching) and the cursor for
+    the next one.
+    """
+    columns = announcement_columns()
+    names = ANNOUNCEMENT_FIELDS if selected is None else [
+        name for name in ANNOUNCEMENT_FIELDS if name in selected
+    ]
+    statement = (
+        select(*[columns[name].label(name) for name in names], *page_keys())
+        .join(User, User.id == Announcement.author_id)  # type: ignore
+        .where(LIVE, *visible_to(viewer))
+    )
+    if query is not None and query.strip():
+        if limit is None:
+            ids = search_announcements(session, query.strip(), filters=visible_to(viewer))
+            nextCursor = None
+        else:
+            ids, nextCursor = search_page(session, query.strip(), limit, cursor, viewer)
+        rank = {announcement_id: idx for idx, announcement_id in enumerate(ids)}
+        rows = session.exec(statement.where(Announcement.id.in_(ids))).all()  # type: ignore
+        rows = sorted(rows, key=lambda row: rank[row.page_id])
+    elif limit is None:
+        statement = statement.order_by(Announcement.date.desc())  # pyright: ignore[reportAttributeAccessIssue]
+        rows, nextCursor = list(session.exec(statement).all()), None
+    else:
+        rows, nextCursor = next_page(
+            list(session.exec(paginate(statement, limit, cursor)).all()), limit
+        )
+    return [announcement_values(row, names) for row in rows], nextCursor
 
 
 def post_announcement(
@@ -36,44 +314,41 @@ def post_announcement(
     author_id: str,
     date: str,
     priority: int,
+    audience: list[list[str]] | None = None,
 ) -> AnnouncementReturn:
+    if audience is not None:
+        validate_audience(audience)
+    # Inline images are moved to the blob store; rows keep only their URLs.
+    content = externalize_content(content)
+    thumbnail = externalize_thumbnail(thumbnail)
     new_announcement = Announcement(
         title=title,
         description=description,
         content=content,
+        search_text=content_text(content),
         thumbnail=thumbnail,
         author_id=author_id,
         date=date,
         priority=priority,
     )
-    session.add(new_announcement)
+    set_audience(session, new_announcement, EVERYONE if audience is None else audience)
     session.commit()
-    session.refresh(new_announcement)
-    user = session.get(User, author_id)
-    if not user:
+    created = get_announcement_by_ID(session, new_announcement.id)  # type: ignore
+    if not created:
         raise ValueError("Author not found.")
-    return AnnouncementReturn(
-        id=new_announcement.id,
-        title=new_announcement.title,
-        description=new_announcement.description,
-        content=new_announcement.content,
-        thumbnail=new_announcement.thumbnail,
-        author_id=new_announcement.author_id,
-        authorName=user.name,
-        authorImage=user.image,
-        date=new_announcement.date,
-        priority=new_announcement.priority,
-    )
+    return created
 
 
 def delete_announcement(session: Session, announcement_id: int, user_id: str) -> None:
-    announcement = session.get(Announcement, announcement_id)
-    if announcement:
+    announcement = session.get(Announcement, announcement_id, options=defer_heavy())
+    if announcement and not announcement.deleted:
         if announcement.author_id != user_id:
             raise PermissionError(
                 "You do not have permission to delete this announcement."
             )
-        session.delete(announcement)
+        # Leave a tombstone so delta-syncing clients learn about the delete.
+        announcement.deleted = True
+        session.add(announcement)
         session.commit()
 
 
@@ -86,61 +361,177 @@ def edit_announcement(
     content: str | None = None,
     thumbnail: str | None = None,
     priority: int | None = None,
+    audience: list[list[str]] | None = None,
 ) -> AnnouncementReturn | None:
-    announcement = session.get(Announcement, announcement_id)
-    if announcement:
+    announcement = session.get(Announcement, announcement_id, options=defer_heavy())
+    if announcement and not announcement.deleted:
         if announcement.author_id != user_id:
             raise PermissionError(
                 "You do not have permission to edit this announcement."
             )
+        if audience is not None:
+            validate_audience(audience)
         if title is not None:
             announcement.title = title
         if description is not None:
             announcement.description = description
         if content is not None:
-            announcement.content = content
+            announcement.content = externalize_content(content)
+            announcement.search_text = content_text(content)
         if thumbnail is not None:
-            announcement.thumbnail = thumbnail
+            announcement.thumbnail = externalize_thumbnail(thumbnail)
         if priority is not None:
             announcement.priority = priority
+        if audience is not None:
+            set_audience(session, announcement, audience)
         session.add(announcement)
         session.commit()
-        session.refresh(announcement)
-        user = session.get(User, announcement.author_id)
-        if not user:
+        edited = get_announcement_by_ID(session, announcement_id)
+        if not edited:
             raise ValueError("Author not found.")
-        return AnnouncementReturn(
-            id=announcement.id,
-            title=announcement.title,
-            description=announcement.description,
-            content=announcement.content,
-            thumbnail=announcement.thumbnail,
-            author_id=announcement.author_id,
-            authorName=user.name,
-            authorImage=user.image,
-            date=announcement.date,
-            priority=announcement.priority,
-        )
+        return edited
     return None
 
 
 def get_announcement_by_ID(
     session: Session,
     announcement_id: int,
+    viewer: Viewer | None = None,
 ) -> AnnouncementReturn | None:
-    announcement = session.get(Announcement, announcement_id)
-    user = session.get(User, announcement.author_id) if announcement else None
-    if announcement and user:
-        return AnnouncementReturn(
-            id=announcement.id,
-            title=announcement.title,
-            description=announcement.description,
-            content=announcement.content,
-            thumbnail=announcement.thumbnail,
-            author_id=announcement.author_id,
-            authorName=user.name,
-            authorImage=user.image,
-            date=announcement.date,
-            priority=announcement.priority,
-        )
+    columns = announcement_columns()
+    row = session.exec(
+        select(*[columns[name].label(name) for name in ANNOUNCEMENT_FIELDS])
+        .join(User, User.id == Announcement.author_id)  # type: ignore
+        .where(Announcement.id == announcement_id, LIVE, *visible_to(viewer))
+    ).first()
+    if row:
+        return AnnouncementReturn(**announcement_values(row, ANNOUNCEMENT_FIELDS))
     return None
+
+
+def get_announcement_content(
+    session: Session,
+    announcement_id: int,
+    viewer: Viewer | None = None,
+) -> tuple[bool, str | None]:
+    """Whether the announcement exists, and its body; nothing else is loaded."""
+    row = session.exec(
+        select(Announcement.id, Announcement.content).where(
+            Announcement.id == announcement_id, LIVE, *visible_to(viewer)
+        )
+    ).first()
+    return (False, None) if row is None else (True, row.content)
+
+
+def fetch_announcement_changes(
+    session: Session,
+    since: int,
+    selected: list[str] | None = None,
+    limit: int = MAX_CHANGES,
+    viewer: Viewer | None = None,
+) -> dict[str, Any]:
+    """Announcements written and deleted after change version since.
+
+    since=0 returns every live announcement. Pass the returned version as
+    since next time; when more is true, call again straight away. Changes
+    that take an announcement out of viewer's audience are sent as deletes.
+    """
+    visible = visible_to(viewer)
+    columns = announcement_columns()
+    names = ANNOUNCEMENT_FIELDS if selected is None else [
+        name for name in ANNOUNCEMENT_FIELDS if name in selected
+    ]
+    statement = (
+        select(
+            *[columns[name].label(name) for name in names],
+            Announcement.change_version.label("change_version"),  # pyright: ignore[reportAttributeAccessIssue]
+            Announcement.deleted.label("deleted"),  # pyright: ignore[reportAttributeAccessIssue]
+            Announcement.id.label("change_id"),  # pyright: ignore[reportOptionalMemberAccess]
+            (or_(*visible) if visible else true()).label("visible"),
+        )
+        .join(User, User.id == Announcement.author_id)  # type: ignore
+        .order_by(Announcement.change_version)
+        .limit(limit + 1)
+    )
+    if since > 0:
+        statement = statement.where(Announcement.change_version > since)
+    else:
+        statement = statement.where(LIVE, *visible)
+    rows = list(session.exec(statement).all())
+    more = len(rows) > limit
+    if more:
+        # One flush stamps all its rows with the same version, so never split
+        # a version across responses.
+        cut = rows[limit].change_version
+        rows = [row for row in rows if row.change_version < cut]
+        if not rows:
+            # A single version bigger than the page is sent whole, and more
+            # only stays true if something was written after it.
+            rows = list(
+                session.exec(
+                    statement.limit(None).where(Announcement.change_version == cut)
+                ).all()
+            )
+            more = (
+                session.exec(
+                    statement.limit(1).where(Announcement.change_version > cut)
+                ).first()
+                is not None
+            )
+    return {
+        "version": rows[-1].change_version if rows else since,
+        "more": more,
+        "announcements": [
+            announcement_values(row, names)
+            for row in rows
+            if row.visible and not row.deleted
+        ],
+        "deleted": [row.change_id for row in rows if row.deleted or not row.visible],
+    }
+
+
+def setup_change_feed(connection: Connection) -> None:
+    """Add the columns fetch_announcement_changes relies on, if missing."""
+    columns = {column["name"] for column in inspect(connection).get_columns("announcement")}
+    if "change_version" not in columns:
+        connection.execute(
+            text("ALTER TABLE announcement ADD COLUMN change_version INTEGER NOT NULL DEFAULT 0")
+        )
+    if "deleted" not in columns:
+        connection.execute(
+            text("ALTER TABLE announcement ADD COLUMN deleted BOOLEAN NOT NULL DEFAULT false")
+        )
+    for index in Announcement.__table__.indexes:  # type: ignore
+        if index.name in ("ix_announcement_change_version", "ix_announcement_feed_order"):
+            index.create(connection, checkfirst=True)
+
+
+def backfill_change_versions(connection: Connection) -> None:
+    """Stamp announcements written before the change feed with versions of their own.
+
+    They are numbered past the announcement DataVersion in id order, and the
+    counter is moved past them, so since=0 pages through them like any other
+    change. Core only, so it runs against schemas older than the current model.
+    """
+    announcement = Announcement.__table__  # type: ignore
+    counter = DataVersion.__table__  # type: ignore
+    unstamped = announcement.c.change_version == 0
+    last = connection.execute(select(func.max(announcement.c.id)).where(unstamped)).scalar()
+    if last is None:
+        return
+    current = connection.execute(
+        select(counter.c.version).where(counter.c.table_name == Announcement.__tablename__)
+    ).scalar()
+    if current is None:
+        current = 0
+        connection.execute(
+            counter.insert().values(table_name=Announcement.__tablename__, version=0)
+        )
+    connection.execute(
+        update(announcement).where(unstamped).values(change_version=announcement.c.id + current)
+    )
+    connection.execute(
+        update(counter)
+        .where(counter.c.table_name == Announcement.__tablename__)
+        .values(version=current + last)
+    )
@@ -0,0 +1,168 @@
+import json
+from typing import Any
+
+from sqlalchemy import Connection, column, func, literal_column, table, text, update
+from sqlmodel import Session, select
+
+from app.domain.common import fts5_query, tsquery_text
+from app.models import Announcement
+
+# Language-neutral on purpose: announcements mix Thai and English.
+SEARCH_CONFIG = "simple"
+
+
+def content_text(content: str | None) -> str | None:
+    """The plain text of a Tiptap document, for indexing.
+
+    Content that is not Tiptap JSON is indexed as is.
+    """
+    if content is None:
+        return None
+    try:
+        document = json.loads(content)
+    except ValueError:
+        return content
+    texts: list[str] = []
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            if isinstance(node.get("text"), str):
+                texts.append(node["text"])
+            for child in node.get("content") or []:
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    walk(document)
+    return " ".join(texts)
+
+
+def search_document(prefix: str = "") -> str:
+    # Must stay textually identical between the index and the queries, or
+    # Postgres will not use ix_announcement_search.
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in (("title", "A"), ("description", "B"), ("search_text", "C"))
+    )
+
+
+def setup_search(connection: Connection) -> None:
+    """Create the full-text index for the connected database, if missing."""
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_announcement_search ON announcement "
+                f"USING GIN (({search_document()}))"
+            )
+        )
+    elif connection.dialect.name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'announcement_fts'")
+        ).first()
+        if exists:
+            return
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE announcement_fts USING fts5("
+                "title, description, search_text, "
+                "content='announcement', content_rowid='id')"
+            )
+        )
+        # Keep the external-content table in sync with announcement.
+        connection.execute(
+            text(
+                "CREATE TRIGGER announcement_fts_insert AFTER INSERT ON announcement BEGIN "
+                "INSERT INTO announcement_fts(rowid, title, description, search_text) "
+                "VALUES (new.id, new.title, new.description, new.search_text); END"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TRIGGER announcement_fts_delete AFTER DELETE ON announcement BEGIN "
+                "INSERT INTO announcement_fts(announcement_fts, rowid, title, description, search_text) "
+                "VALUES ('delete', old.id, old.title, old.description, old.search_text); END"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TRIGGER announcement_fts_update AFTER UPDATE ON announcement BEGIN "
+                "INSERT INTO announcement_fts(announcement_fts, rowid, title, description, search_text) "
+                "VALUES ('delete', old.id, old.title, old.description, old.search_text); "
+                "INSERT INTO announcement_fts(rowid, title, description, search_text) "
+                "VALUES (new.id, new.title, new.description, new.search_text); END"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO announcement_fts(announcement_fts) VALUES ('rebuild')")
+        )
+
+
+def backfill_search_text(connection: Connection) -> None:
+    """Fill search_text for announcements written before it existed.
+
+    Core only, so it runs against schemas older than the current model.
+    """
+    announcement = Announcement.__table__  # type: ignore
+    rows = connection.execute(
+        select(announcement.c.id, announcement.c.content).where(
+            announcement.c.search_text == None,  # noqa: E711
+            announcement.c.content != None,  # noqa: E711
+        )
+    ).all()
+    for row in rows:
+        connection.execute(
+            update(announcement)
+            .where(announcement.c.id == row.id)
+            .values(search_text=content_text(row.content))
+        )
+
+
+def search_announcements(
+    session: Session,
+    query: str,
+    limit: int | None = None,
+    offset: int = 0,
+    filters: list[Any] | None = None,
+) -> list[int]:
+    """Ids of the announcements matching query, best match first.
+
+    filters are extra where clauses on Announcement, such as its audience.
+    """
+    dialect = session.get_bind().dialect.name
+    live = Announcement.deleted == False  # noqa: E712
+    if dialect == "postgresql":
+        terms = tsquery_text(query)
+        if not terms:
+            return []
+        document = literal_column(f"({search_document('announcement.')})")
+        tsquery = func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), terms)
+        statement = (
+            select(Announcement.id)
+            .where(document.op("@@")(tsquery), live, *(filters or []))
+            .order_by(
+                func.ts_rank(document, tsquery).desc(),
+                Announcement.id.desc(),  # pyright: ignore[reportOptionalMemberAccess]
+            )
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())  # type: ignore
+    if dialect == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return []
+        fts = table("announcement_fts", column("rowid"))
+        statement = (
+            select(Announcement.id)
+            .join(fts, fts.c.rowid == Announcement.id)
+            .where(literal_column("announcement_fts").op("MATCH")(match), live, *(filters or []))
+            .order_by(
+                func.bm25(literal_column("announcement_fts"), 10.0, 5.0, 1.0),
+                Announcement.id.desc(),  # pyright: ignore[reportOptionalMemberAccess]
+            )
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(session.exec(statement).all())  # type: ignore
+    raise NotImplementedError(f"Full-text search is not set up for {dialect}")
@@ -1,8 +1,17 @@
 from app.domain.common.matching import (  # noqa : F401
+    AudienceMatcher,
+    audience_key,
     check_tag_strong,
     check_tag_weak,
     format_str_tags,
     str_to_tags,
     tags_to_str,
+    viewer_keys,
+)
+from app.domain.common.query import (  # noqa : F401
+    decode_cursor,
+    encode_cursor,
+    fts5_query,
+    tsquery_text,
 )
 from app.schemas.types import Room, room_from_tag  # noqa : F401
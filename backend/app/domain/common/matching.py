@@ -1,15 +1,15 @@
 import json
+from itertools import combinations
+from typing import Hashable
 
 
 def check_tag_strong(sources: list[list[str]], target: list[str]) -> bool:
-    output = False
     temTarget = set(target)
     for source in sources:
         temSource = set(source)
-        output = output or temSource > temTarget
-        if "all-classes" in temSource:
-            output = True
-    return output
+        if "all-classes" in temSource or temSource > temTarget:
+            return True
+    return False
 
 
 def check_tag_weak(source: list[str], target: list[str]) -> bool:
@@ -22,6 +22,70 @@ def check_tag_weak(source: list[str], target: list[str]) -> bool:
     return output
 
 
+class AudienceMatcher:
+    """check_tag_strong precompiled over a fixed set of targets.
+
+    Every target gets one bit, and an audience (the `for` list of an action)
+    compiles to the mask of targets it matches, so checking a known target is
+    a single AND.
+    """
+
+    def __init__(self, targets: dict[Hashable, list[str]]):
+        self.targets = targets
+        self.masks = {key: 1 << bit for bit, key in enumerate(targets)}
+        self.everyone = (1 << len(targets)) - 1
+        self.byTag: dict[str, list[Hashable]] = {}
+        for key, target in targets.items():
+            for tag in target:
+                self.byTag.setdefault(tag, []).append(key)
+
+    def compile(self, sources: list[list[str]]) -> int:
+        audience = 0
+        for source in sources:
+            if "all-classes" in source:
+                return self.everyone
+            for tag in source:
+                for key in self.byTag.get(tag, []):
+                    if not audience & self.masks[key] and check_tag_strong(
+                        [source], self.targets[key]
+                    ):
+                        audience |= self.masks[key]
+        return audience
+
+    def check(
+        self,
+        audience: int,
+        sources: list[list[str]],
+        key: Hashable,
+        target: list[str],
+    ) -> bool:
+        mask = self.masks.get(key)
+        if mask is None:
+            return check_tag_strong(sources, target)
+        return audience & mask != 0
+
+
+def audience_key(source: list[str]) -> str:
+    """The visibility index key of one audience group, see viewer_keys."""
+    if "all-classes" in source:
+        return "all-classes"
+    return "+".join(sorted(set(source)))
+
+
+def viewer_keys(target: list[str]) -> list[str]:
+    """Every audience_key whose group reaches target.
+
+    A group reaches target when all of its tags are among target's tags, so
+    ["year2"] reaches ["year2", "Computer", "class-C2R1"]. Looking these keys
+    up in an index finds everything visible to target without scanning.
+    """
+    tags = sorted(set(target))
+    keys = ["all-classes"]
+    for size in range(1, len(tags) + 1):
+        keys.extend("+".join(group) for group in combinations(tags, size))
+    return keys
+
+
 def str_to_tags(source: str | None) -> list[str]:
     if source is None:
         return []
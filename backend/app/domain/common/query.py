@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(*key: Any) -> str:
+    raw = json.dumps(list(key), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Inverse of encode_cursor, raising ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if (
+        not isinstance(key, list)
+        or len(key) != len(types)
+        or not all(type(value) is kind for value, kind in zip(key, types))
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def fts5_query(query: str) -> str:
+    # Every word as a quoted string, so user input cannot use FTS5 syntax;
+    # the last one is a prefix match for search-as-you-type.
+    words = ['"' + word.replace('"', '""') + '"' for word in query.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def tsquery_text(query: str) -> str:
+    # The to_tsquery counterpart of fts5_query: every word a quoted lexeme,
+    # all required, and the last one a prefix match.
+    words = [
+        "'" + word.replace("\\", "\\\\").replace("'", "''") + "'"
+        for word in query.split()
+    ]
+    if words:
+        words[-1] += ":*"
+    return " & ".join(words)
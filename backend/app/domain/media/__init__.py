@@ -0,0 +1,9 @@
+from app.domain.media.blobs import (
+    BlobTooLarge,  # noqa : F401
+    UnsupportedBlobType,  # noqa : F401
+    blob_path,  # noqa : F401
+    externalize_content,  # noqa : F401
+    externalize_thumbnail,  # noqa : F401
+    media_type,  # noqa : F401
+    store_blob,  # noqa : F401
+)
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from app.config import BLOBS_DIR
+
+MAX_BLOB_BYTES = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+URL_PREFIX = "/media/"
+# Only images are accepted, identified by their magic bytes rather than
+# whatever content type the client claims.
+IMAGE_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.(" + "|".join(IMAGE_TYPES) + r")$")
+DATA_URI = re.compile(r"^data:image/[\w.+-]+;base64,(.*)$", re.DOTALL)
+
+
+class BlobTooLarge(Exception):
+    pass
+
+
+class UnsupportedBlobType(Exception):
+    pass
+
+
+def sniff_image(head: bytes) -> str | None:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[0:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "avif"
+    return None
+
+
+def blob_path(name: str) -> Path | None:
+    """Where a blob name from a URL lives, or None if it is not a blob name."""
+    match = BLOB_NAME.match(name)
+    if match is None:
+        return None
+    return BLOBS_DIR / match.group(1)[:2] / name
+
+
+def media_type(name: str) -> str:
+    return IMAGE_TYPES[name.rsplit(".", 1)[1]]
+
+
+def store_blob(stream: BinaryIO) -> str:
+    """Store an image from a file-like object and return its blob name.
+
+    The name is the sha256 of the bytes, so uploading the same image twice
+    stores it once. Raises BlobTooLarge or UnsupportedBlobType.
+    """
+    BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    with tempfile.NamedTemporaryFile(dir=BLOBS_DIR, prefix=".upload-", delete=False) as tmp:
+        try:
+            while chunk := stream.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_BLOB_BYTES:
+                    raise BlobTooLarge(f"Images are limited to {MAX_BLOB_BYTES} bytes")
+                if len(head) < 16:
+                    head += chunk[: 16 - len(head)]
+                digest.update(chunk)
+                tmp.write(chunk)
+            extension = sniff_image(head)
+            if extension is None:
+                raise UnsupportedBlobType("Only PNG, JPEG, GIF, WebP and AVIF images are accepted")
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    name = f"{digest.hexdigest()}.{extension}"
+    path = blob_path(name)
+    assert path is not None
+    if path.exists():
+        os.unlink(tmp.name)
+    else:
+        path.parent.mkdir(exist_ok=True)
+        os.replace(tmp.name, path)
+    return name
+
+
+def store_data_uri(value: str) -> str | None:
+    """Store an inline base64 image and return its URL, or None if it cannot be.
+
+    Values that are not base64 images, or that store_blob rejects, give None
+    so callers keep them inline as they were.
+    """
+    match = DATA_URI.match(value)
+    if match is None:
+        return None
+    try:
+        raw = base64.b64decode(match.group(1), validate=True)
+    except binascii.Error:
+        return None
+    with tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE) as stream:
+        stream.write(raw)
+        stream.seek(0)
+        try:
+            return URL_PREFIX + store_blob(stream)  # type: ignore
+        except (BlobTooLarge, UnsupportedBlobType):
+            return None
+
+
+def externalize_thumbnail(thumbnail: str | None) -> str | None:
+    """Replace an inline image thumbnail with a blob reference."""
+    if thumbnail is None:
+        return None
+    return store_data_uri(thumbnail) or thumbnail
+
+
+def externalize_content(content: str | None) -> str | None:
+    """Replace inline images in a Tiptap document with blob references."""
+    if content is None or "data:image/" not in content:
+        return content
+    try:
+        document = json.loads(content)
+    except ValueError:
+        return content
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            attrs = node.get("attrs")
+            if isinstance(attrs, dict) and isinstance(attrs.get("src"), str):
+                attrs["src"] = store_data_uri(attrs["src"]) or attrs["src"]
+            for child in node.get("content") or []:
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    walk(document)
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
@@ -2,6 +2,26 @@ from app.domain.schoolScheduler.academicYear import (  # noqa : F401
     get_academic_info,
     get_events,
     get_events_all,
+    month_range,
+    month_summary,
 )
-from app.domain.schoolScheduler.timetable import fixed_week_schedule, week_schedule, get_slots, get_class  # noqa : F401
-
+from app.domain.schoolScheduler.availability import (  # noqa : F401
+    find_conflicts,
+    find_free_rooms,
+    load_room_usage,
+)
+from app.domain.schoolScheduler.ical import academic_ical, timetable_ical  # noqa : F401
+from app.domain.schoolScheduler.occupancy import load_occupancy, room_week, subject_week  # noqa : F401
+from app.domain.schoolScheduler.prebuild import prebuild  # noqa : F401
+from app.domain.schoolScheduler.timetable import (  # noqa : F401
+    fixed_week_schedule,
+    get_class,
+    get_slots,
+    has_timetable,
+    list_classes,
+    load_schedule_store,
+    range_schedule,
+    week_schedule,
+    week_schedules,
+)
+from app.domain.schoolScheduler.validation import validate_volumes  # noqa : F401
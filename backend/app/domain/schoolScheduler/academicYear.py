@@ -1,43 +1,62 @@
-from app.domain.common import check_tag_strong
-from app.schemas.types import Calendar, Event, OverrideType, Room
+from calendar import monthrange
+from datetime import date, timedelta
+
 from app.domain.schoolScheduler import loader
+from app.schemas.types import Calendar, Event, OverrideType, Room
+from app.volumes import snapshot_cache
 
 
-def get_events(room: Room) -> list[Event]:
-    rawEvents = loader.load_event()
-    out: list[Event] = []
-    for idx, event in enumerate(rawEvents):
-        for target in event.get("actions", []):
-            if not check_tag_strong(target["for"], room.toTag()):
-                continue
-        out.append(
-            Event(
-                id=idx,
-                date=event["date"],
-                duration=event.get("duration", 1),
-                title=event["event"],
-                description=event.get("description", ""),
-                type=OverrideType(event.get("type", "other")),
-            )
+@snapshot_cache
+def load_event_objects() -> list[Event]:
+    return [
+        Event(
+            id=idx,
+            date=event["date"],
+            duration=event.get("duration", 1),
+            title=event["event"],
+            description=event.get("description", ""),
+            type=OverrideType(event.get("type", "other")),
         )
-    return out
-
-
-def get_events_all() -> list[Event]:
-    rawEvents = loader.load_event()
-    out: list[Event] = []
-    for idx, event in enumerate(rawEvents):
-        out.append(
-            Event(
-                id=idx,
-                date=event["date"],
-                duration=event.get("duration", 1),
-                title=event["event"],
-                description=event.get("description", ""),
-                type=OverrideType(event.get("type", "other")),
-            )
+        for idx, event in enumerate(loader.load_event())
+    ]
+
+
+def select_events(
+    start: date | None = None, end: date | None = None
+) -> list[tuple[int, dict]]:
+    if start is None and end is None:
+        return list(enumerate(loader.load_event()))
+    return loader.load_event_index().between(start or date.min, end or date.max)
+
+
+def get_events(
+    room: Room, start: date | None = None, end: date | None = None
+) -> list[Event]:
+    matcher = loader.load_audience_matcher()
+    roomKey = room.toKey()
+    objects = load_event_objects()
+    if roomKey in matcher.masks:
+        everyone, byClass = loader.load_class_event_index()
+        found = everyone.between(start or date.min, end or date.max)
+        if roomKey in byClass:
+            found += byClass[roomKey].between(start or date.min, end or date.max)
+            found.sort(key=lambda item: item[0])
+        return [objects[idx] for idx, _ in found]
+    roomTag = room.toTag()
+    return [
+        objects[idx]
+        for idx, event in select_events(start, end)
+        if not event["actions"]
+        or any(
+            matcher.check(target["audience"], target["for"], roomKey, roomTag)
+            for target in event["actions"]
         )
-    return out
+    ]
+
+
+def get_events_all(start: date | None = None, end: date | None = None) -> list[Event]:
+    objects = load_event_objects()
+    return [objects[idx] for idx, _ in select_events(start, end)]
 
 
 def convert(events: list[Event]) -> list[dict]:
@@ -50,3 +69,24 @@ def get_academic_info(events: list[Event]) -> Calendar:
         start=loader.load_academic_info()["academicYear"]["start"],
         end=loader.load_academic_info()["academicYear"]["end"],
     )
+
+
+def month_range(month: str) -> tuple[date, date]:
+    first = date.strptime(month, "%Y-%m")
+    return first, first.replace(day=monthrange(first.year, first.month)[1])
+
+
+def month_summary(events: list[Event], month: str) -> dict[str, int]:
+    """Number of events on each day of a month (YYYY-MM), for the month grid."""
+    first, last = month_range(month)
+    counts = {
+        (first + timedelta(days=diff)).isoformat(): 0
+        for diff in range((last - first).days + 1)
+    }
+    for event in events:
+        day = max(event.date, first)
+        eventLast = min(event.date + timedelta(days=event.duration - 1), last)
+        while day <= eventLast:
+            counts[day.isoformat()] += 1
+            day += timedelta(days=1)
+    return counts
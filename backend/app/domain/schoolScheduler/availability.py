@@ -0,0 +1,119 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Any
+
+from app.domain.schoolScheduler.loader import load_slots
+from app.domain.schoolScheduler.occupancy import load_occupancy
+from app.domain.schoolScheduler.timetable import (
+    FIXED_WEEK,
+    academic_year_range,
+    school_days,
+)
+from app.volumes import snapshot_cache
+
+
+def slot_mask(slotIds: list[str]) -> int:
+    bits = load_slot_bits()
+    mask = 0
+    for slotId in slotIds:
+        mask |= bits.get(slotId, 0)
+    return mask
+
+
+@snapshot_cache
+def load_slot_bits() -> dict[str, int]:
+    return {slot["id"]: 1 << idx for idx, slot in enumerate(load_slots())}
+
+
+RoomUsage = tuple[dict[str, dict[date, int]], list[dict[str, Any]], list[date]]
+
+
+def build_room_usage() -> RoomUsage:
+    # Each room keeps one bitmask of occupied slots per day, so free-room
+    # checks are a single AND and clashes show up as overlapping bits while
+    # the masks are built, without comparing periods pairwise.
+    usage: dict[str, dict[date, int]] = {}
+    conflicts: list[dict[str, Any]] = []
+    for room, days in load_occupancy()[0].items():
+        usage[room] = {}
+        for day, entries in days.items():
+            occupied = 0
+            owners: dict[str, str] = {}
+            for entry in entries:
+                mask = slot_mask(entry["slotIds"])
+                if occupied & mask:
+                    clash = [x for x in entry["slotIds"] if x in owners]
+                    conflicts.append(
+                        {
+                            "date": day,
+                            "room": room,
+                            "slotIds": clash,
+                            "classes": sorted({owners[x] for x in clash} | {entry["class_"]}),
+                        }
+                    )
+                occupied |= mask
+                for slotId in entry["slotIds"]:
+                    owners.setdefault(slotId, entry["class_"])
+            usage[room][day] = occupied
+    conflicts.sort(key=lambda x: (x["date"], x["room"]))
+    return usage, conflicts, [x["date"] for x in conflicts]
+
+
+@snapshot_cache
+def load_room_usage() -> RoomUsage:
+    return build_room_usage()
+
+
+def date_range(start: date | None, end: date | None) -> tuple[date, date]:
+    if start is None:
+        return FIXED_WEEK, FIXED_WEEK + timedelta(days=4)
+    return start, start if end is None else end
+
+
+def check_resolved(start: date, end: date) -> None:
+    """Raise ValueError if a school day from start to end has no resolved timetable.
+
+    Only the academic year and the fixed week are resolved, and any other
+    school day would look free of bookings.
+    """
+    yearStart, yearEnd = academic_year_range()
+    fixedEnd = FIXED_WEEK + timedelta(days=4)
+    for day in school_days(start, end):
+        if not (yearStart <= day <= yearEnd or FIXED_WEEK <= day <= fixedEnd):
+            raise ValueError(
+                f"Dates must be within the academic year ({yearStart} to {yearEnd})"
+            )
+
+
+def find_free_rooms(
+    slotIds: list[str], start: date | None = None, end: date | None = None
+) -> list[str]:
+    """Rooms with none of slotIds booked on any day from start to end.
+
+    Raises ValueError for slot ids that are not in slots.json, or days outside
+    the academic year, which would otherwise report every room free.
+    """
+    unknown = [slotId for slotId in slotIds if slotId not in load_slot_bits()]
+    if unknown:
+        raise ValueError(f"Unknown slots: {', '.join(unknown)}")
+    start, end = date_range(start, end)
+    check_resolved(start, end)
+    wanted = slot_mask(slotIds)
+    days = []
+    day = start
+    while day <= end:
+        days.append(day)
+        day += timedelta(days=1)
+    return sorted(
+        room
+        for room, byDay in load_room_usage()[0].items()
+        if not any(byDay.get(day, 0) & wanted for day in days)
+    )
+
+
+def find_conflicts(start: date | None = None, end: date | None = None) -> list[dict[str, Any]]:
+    """Double bookings from start to end; ValueError for days outside the academic year."""
+    start, end = date_range(start, end)
+    check_resolved(start, end)
+    _, conflicts, dates = load_room_usage()
+    return conflicts[bisect_left(dates, start) : bisect_right(dates, end)]
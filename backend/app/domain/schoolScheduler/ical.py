@@ -0,0 +1,158 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator
+
+from app.domain.schoolScheduler.academicYear import get_events, get_events_all
+from app.domain.schoolScheduler.loader import load_slots
+from app.domain.schoolScheduler.timetable import (
+    academic_year_range,
+    date_to_start_of_week,
+    week_schedule,
+)
+from app import volumes
+from app.schemas.types import Event, Room
+
+
+def ical_text(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def ical_line(line: str) -> str:
+    # Lines longer than 75 octets are folded onto continuation lines that
+    # start with a space (RFC 5545 3.1).
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts = []
+    while raw:
+        size = 75 if not parts else 74
+        while size < len(raw) and (raw[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(raw[:size].decode())
+        raw = raw[size:]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def ical_header(name: str) -> str:
+    return "".join(
+        ical_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Schooler//Schooler API//EN",
+            "CALSCALE:GREGORIAN",
+            f"X-WR-CALNAME:{ical_text(name)}",
+        )
+    )
+
+
+def ical_footer() -> str:
+    return ical_line("END:VCALENDAR")
+
+
+def ical_event(uid: str, stamp: str, start: str, end: str, summary: str, **extra: str) -> str:
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{stamp}", start, end, f"SUMMARY:{ical_text(summary)}"]
+    lines += [f"{key.upper()}:{ical_text(value)}" for key, value in extra.items() if value]
+    lines.append("END:VEVENT")
+    return "".join(ical_line(line) for line in lines)
+
+
+def event_to_ical(event: Event, stamp: str) -> str:
+    return ical_event(
+        uid=f"event-{event.id}-{event.date.isoformat()}@schooler",
+        stamp=stamp,
+        start=f"DTSTART;VALUE=DATE:{event.date.strftime('%Y%m%d')}",
+        end=f"DTEND;VALUE=DATE:{(event.date + timedelta(days=event.duration)).strftime('%Y%m%d')}",
+        summary=event.title,
+        description=event.description or "",
+        categories=event.type.value,
+    )
+
+
+def ical_stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def weeks_of_academic_year() -> Iterator[tuple[date, date, date]]:
+    start, end = academic_year_range()
+    week = date_to_start_of_week(start)
+    while week <= end:
+        yield week, max(week, start), min(week + timedelta(days=6), end)
+        week += timedelta(days=7)
+
+
+def starts_in(event: Event, first: date) -> bool:
+    # Events spanning several weeks are written once, in the week they start
+    # (or the first week, for events already running when the year starts).
+    return event.date >= first or first == academic_year_range()[0]
+
+
+def timetable_ical(room: Room) -> Iterator[str]:
+    """A class's timetable and events for the academic year, one week per chunk."""
+    # Every chunk is built from the snapshot the feed started on, even if the
+    # volumes are reloaded while it is streaming.
+    snapshot = volumes.current()
+    stamp = ical_stamp()
+    with volumes.pinned(snapshot):
+        slots = {slot["id"]: slot for slot in load_slots()}
+        weeks = list(weeks_of_academic_year())
+    yield ical_header(f"{room.class_} timetable")
+    for week, first, last in weeks:
+        with volumes.pinned(snapshot):
+            chunk = timetable_ical_week(room, week, first, last, slots, stamp)
+        yield chunk
+    yield ical_footer()
+
+
+def timetable_ical_week(
+    room: Room, week: date, first: date, last: date, slots: dict[str, dict], stamp: str
+) -> str:
+    chunk = []
+    days, _ = week_schedule(room, week)
+    for weekday, entries in days.items():
+        day = week + timedelta(days=weekday - 1)
+        if not first <= day <= last:
+            continue
+        for entry in entries:
+            if entry["isLunch"] or entry["id"] == "shr" or not entry["slotIds"]:
+                continue
+            startSlot = slots[entry["slotIds"][0]]
+            endSlot = slots[entry["slotIds"][-1]]
+            chunk.append(
+                ical_event(
+                    uid=f"{room.class_}-{day.isoformat()}-{entry['slotIds'][0]}@schooler",
+                    stamp=stamp,
+                    start=f"DTSTART:{day.strftime('%Y%m%d')}T{startSlot['start'].replace(':', '')}00",
+                    end=f"DTEND:{day.strftime('%Y%m%d')}T{endSlot['end'].replace(':', '')}00",
+                    summary=entry["title"],
+                    location=entry["location"] or "",
+                )
+            )
+    chunk += [
+        event_to_ical(event, stamp)
+        for event in get_events(room, first, last)
+        if starts_in(event, first)
+    ]
+    return "".join(chunk)
+
+
+def academic_ical() -> Iterator[str]:
+    """The school-wide academic calendar, one week per chunk."""
+    snapshot = volumes.current()
+    stamp = ical_stamp()
+    with volumes.pinned(snapshot):
+        weeks = list(weeks_of_academic_year())
+    yield ical_header("Academic calendar")
+    for _, first, last in weeks:
+        with volumes.pinned(snapshot):
+            chunk = "".join(
+                event_to_ical(event, stamp)
+                for event in get_events_all(first, last)
+                if starts_in(event, first)
+            )
+        yield chunk
+    yield ical_footer()
@@ -1,46 +1,162 @@
-import json
-from datetime import date
-from functools import cache
-from typing import Any
-from pathlib import Path
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Any, Hashable
+
+from app import volumes
+from app.domain.common import AudienceMatcher, Room
+from app.schemas.types import Period, load_info
+from app.volumes import snapshot_cache
 
 
-@cache
 def load_schedule():
-    file_path = Path(__file__).parent.parent.parent.parent / "volumes" / "timetables.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-    return out
+    return volumes.current().files["timetables.json"]
+
 
-@cache
 def load_slots():
-    file_path = Path(__file__).parent.parent.parent.parent / "volumes" / "slots.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-    return out
+    return volumes.current().files["slots.json"]
 
 
-@cache
 def load_special() -> list[dict[str, Any]]:
-    file_path = Path(__file__).parent.parent.parent.parent / "volumes" / "special.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-    return out
+    return volumes.current().files["special.json"]
+
+
+def to_template(periods: list[dict[str, Any]]) -> tuple[Period, ...]:
+    return tuple(
+        sorted(
+            (
+                Period(
+                    id=period["id"],
+                    timeslot=period["timeslot"],
+                    subject=period.get("subject", ""),
+                    where=period.get("where", ""),
+                    duration=period.get("duration", 1),
+                )
+                for period in periods
+            ),
+            key=lambda period: period.timeslot,
+        )
+    )
+
+
+@snapshot_cache
+def load_templates() -> dict[str, dict[str, tuple[Period, ...]]]:
+    return {
+        class_: {day: to_template(periods) for day, periods in days.items()}
+        for class_, days in load_schedule().items()
+    }
+
+
+@snapshot_cache
+def load_special_templates() -> dict[str, tuple[Period, ...]]:
+    return {
+        special["class name"]: to_template(special["schedule"])
+        for special in load_special()
+    }
+
+
+@snapshot_cache
+def load_audience_tags() -> frozenset[str]:
+    """Every tag an audience may use, in the Room.toTag() vocabulary."""
+    info = load_info()
+    tags = {"all-classes", *info["departments"]}
+    tags.update(f"year{grade}" for grade in info["grades"])
+    for year, departments in info["classes"].items():
+        tags.add(f"year{year}")
+        for department, rooms in departments.items():
+            tags.add(department)
+            tags.update(f"class-{class_}" for class_ in rooms)
+    return frozenset(tags)
+
 
+@snapshot_cache
+def load_audience_matcher() -> AudienceMatcher:
+    rooms = [
+        Room(year, department, class_)
+        for year, departments in load_info()["classes"].items()
+        for department, classes in departments.items()
+        for class_ in classes
+    ]
+    return AudienceMatcher({room.toKey(): room.toTag() for room in rooms})
 
-@cache
+
+@snapshot_cache
 def load_event():
-    file_path = Path(__file__).parent.parent.parent.parent / "volumes" / "override.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-        for event in out:
-            event["date"] = date.strptime(event["date"], "%Y-%m-%d")
-    return out
+    matcher = load_audience_matcher()
+    return [
+        dict(
+            event,
+            date=date.strptime(event["date"], "%Y-%m-%d"),
+            actions=[
+                dict(action, audience=matcher.compile(action["for"]))
+                for action in event.get("actions", [])
+            ],
+        )
+        for event in volumes.current().files["override.json"]
+    ]
 
 
-@cache
 def load_academic_info():
-    file_path = Path(__file__).parent.parent.parent.parent / "volumes" / "academicInfo.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-    return out
+    return volumes.current().files["academicInfo.json"]
+
+
+class EventIndex:
+    """Events sorted by start date, queried by bisecting on the start and
+    bounding the scan with the longest duration in the file."""
+
+    def __init__(self, events: list[tuple[int, dict[str, Any]]]):
+        self.entries = sorted(
+            (
+                (event["date"], event["date"] + timedelta(days=event.get("duration", 1)), idx, event)
+                for idx, event in events
+            ),
+            key=lambda entry: (entry[0], entry[2]),
+        )
+        self.starts = [entry[0] for entry in self.entries]
+        self.maxDuration = max((event.get("duration", 1) for _, event in events), default=1)
+
+    def between(self, start: date, end: date) -> list[tuple[int, dict[str, Any]]]:
+        """Events touching any day in [start, end], in file order."""
+        reach = timedelta(days=self.maxDuration - 1)
+        lo = bisect_left(self.starts, start - reach if start - date.min > reach else date.min)
+        hi = bisect_right(self.starts, end)
+        out = [
+            (idx, event)
+            for _, eventEnd, idx, event in self.entries[lo:hi]
+            if eventEnd > start
+        ]
+        out.sort(key=lambda item: item[0])
+        return out
+
+    def on(self, when: date) -> list[tuple[int, dict[str, Any]]]:
+        """Events touching the given day, in file order."""
+        return self.between(when, when)
+
+
+@snapshot_cache
+def load_event_index() -> EventIndex:
+    return EventIndex(list(enumerate(load_event())))
+
+
+@snapshot_cache
+def load_class_event_index() -> tuple[EventIndex, dict[Hashable, EventIndex]]:
+    # Events for everyone share one index; each class only gets its own index
+    # of the events targeted at it, so memory grows with targeted events
+    # rather than with classes x events.
+    matcher = load_audience_matcher()
+    keys = list(matcher.masks)
+    everyone: list[tuple[int, dict[str, Any]]] = []
+    targeted: dict[Hashable, list[tuple[int, dict[str, Any]]]] = {}
+    for idx, event in enumerate(load_event()):
+        audience = matcher.everyone if not event["actions"] else 0
+        for action in event["actions"]:
+            audience |= action["audience"]
+        if audience == matcher.everyone:
+            everyone.append((idx, event))
+            continue
+        while audience:
+            bit = audience & -audience
+            targeted.setdefault(keys[bit.bit_length() - 1], []).append((idx, event))
+            audience ^= bit
+    return EventIndex(everyone), {
+        key: EventIndex(events) for key, events in targeted.items()
+    }
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from typing import Any
+
+from app.domain.schoolScheduler.loader import load_slots
+from app.domain.schoolScheduler.timetable import (
+    FIXED_WEEK,
+    date_to_start_of_week,
+    load_schedule_store,
+)
+from app.volumes import snapshot_cache
+
+Occupancy = dict[str, dict[date, list[dict[str, Any]]]]
+
+
+def build_occupancy() -> tuple[Occupancy, Occupancy]:
+    # Invert the resolved store into room -> date -> periods and
+    # subject -> date -> periods, tagged with the class taking them.
+    slotOrder = {slot["id"]: idx for idx, slot in enumerate(load_slots())}
+    byRoom: Occupancy = {}
+    bySubject: Occupancy = {}
+    for (_, _, class_), days in load_schedule_store().items():
+        for day, (entries, _) in days.items():
+            for entry in entries:
+                if entry["isLunch"] or entry["id"] == "shr":
+                    continue
+                tagged = dict(entry, class_=class_)
+                if entry["location"]:
+                    byRoom.setdefault(entry["location"], {}).setdefault(day, []).append(tagged)
+                bySubject.setdefault(entry["id"], {}).setdefault(day, []).append(tagged)
+    for index in (byRoom, bySubject):
+        for days in index.values():
+            for entries in days.values():
+                entries.sort(key=lambda x: slotOrder.get(x["slotIds"][0], 0))
+    return byRoom, bySubject
+
+
+@snapshot_cache
+def load_occupancy() -> tuple[Occupancy, Occupancy]:
+    return build_occupancy()
+
+
+def occupancy_week(
+    index: Occupancy, key: str, when: date | None = None
+) -> dict[int, list[dict[str, Any]]] | None:
+    days = index.get(key)
+    if days is None:
+        return None
+    startDate = date_to_start_of_week(FIXED_WEEK if when is None else when)
+    return {
+        diff + 1: days.get(startDate + timedelta(days=diff), []) for diff in range(5)
+    }
+
+
+def room_week(room: str, when: date | None = None) -> dict[int, list[dict[str, Any]]] | None:
+    return occupancy_week(load_occupancy()[0], room, when)
+
+
+def subject_week(subject: str, when: date | None = None) -> dict[int, list[dict[str, Any]]] | None:
+    return occupancy_week(load_occupancy()[1], subject, when)
@@ -0,0 +1,15 @@
+from app import volumes
+from app.domain.schoolScheduler.availability import load_room_usage
+from app.domain.schoolScheduler.occupancy import load_occupancy
+from app.domain.schoolScheduler.timetable import load_schedule_store
+from app.domain.schoolScheduler.validation import validate_volumes
+
+
+def prebuild() -> None:
+    """Validate the current snapshot and build its schedule store and indexes."""
+    problems = validate_volumes(dict(volumes.current().files))
+    if problems:
+        raise ValueError("Invalid volumes data:\n" + "\n".join(problems))
+    load_schedule_store()
+    load_occupancy()
+    load_room_usage()
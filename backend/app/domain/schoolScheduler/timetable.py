@@ -1,23 +1,49 @@
-from copy import deepcopy
-from dataclasses import asdict
+from collections.abc import Iterator, Sequence
 from datetime import date, timedelta
 from typing import Any
 
-from app.domain.common import Room, check_tag_strong
+from app import volumes
+
+from app.domain.common import Room
 from app.domain.schoolScheduler.loader import (
-    load_event,
+    load_academic_info,
+    load_audience_matcher,
+    load_event_index,
     load_schedule,
     load_slots,
-    load_special,
+    load_special_templates,
+    load_templates,
 )
-from app.schemas.types import CLASSES_LOOKUP, TIME_LOOKUP, TimeScheduleTS
+from app.schemas.types import TIME_LOOKUP, Period, load_info
+from app.volumes import snapshot_cache
+
+
+def slot_entry(
+    id: str,
+    title: str,
+    slotIds: list[str],
+    location: str | None = None,
+    overlapsBreak: bool = False,
+    isLunch: bool = False,
+) -> dict[str, Any]:
+    # Same shape as TimeScheduleTS, built directly instead of via asdict.
+    return {
+        "id": id,
+        "title": title,
+        "slotIds": slotIds,
+        "location": location,
+        "endsEarly": False,
+        "overlapsBreak": overlapsBreak,
+        "isBreak": False,
+        "isLunch": isLunch,
+    }
 
 
 def convert_timetable(
-    rawTimetable: tuple[list[dict[str, Any]], list[str]],
+    rawTimetable: tuple[Sequence[Period], list],
     hasSHR: bool | None = None,
     hasLunch: bool | None = None,
-) -> tuple[list[dict[str, Any]], list[str]]:
+) -> tuple[list[dict[str, Any]], list]:
     dayTimetable = rawTimetable[0]
     if len(rawTimetable[1]) != 0:
         hasSHR = False
@@ -26,82 +52,79 @@ def convert_timetable(
         hasSHR = True
     if hasLunch is None:
         hasLunch = True
-    for timetable in dayTimetable:
-        if timetable["id"] == "shr":
+    for period in dayTimetable:
+        if period.id == "shr":
             hasSHR = True
-        if timetable["id"] == "lunch":
+        if period.id == "lunch":
             hasLunch = True
-    dayTimetable.sort(key=lambda x: x["timeslot"])
-    output: list[TimeScheduleTS] = []
+    output: list[dict[str, Any]] = []
     if hasSHR:
-        output.append(TimeScheduleTS("shr", "SHR", ["s1"]))
+        output.append(slot_entry("shr", "SHR", ["s1"]))
     passLunch = False
     lastTimeslot = 1
-    for timetable in dayTimetable:
-        timeslot = timetable["timeslot"]
-        id = timetable.get("id", "")
-        title = timetable.get("subject", "")
-        duration = timetable.get("duration", 1)
-        location = timetable.get("where", "")
-        if timeslot - lastTimeslot > 0:
-            output[-1].endsEarly = True
+    for period in dayTimetable:
+        timeslot = period.timeslot
+        duration = period.duration
+        if output and timeslot - lastTimeslot > 0:
+            output[-1]["endsEarly"] = True
         if hasLunch and timeslot > 4 and not passLunch:
             passLunch = True
-            output.append(TimeScheduleTS("lunch", "Lunch", ["s6"], isLunch=True))
+            output.append(slot_entry("lunch", "Lunch", ["s6"], isLunch=True))
             lastTimeslot = 6
-        if timetable["id"] == "shr" or timetable["id"] == "lunch":
+        if period.id == "shr" or period.id == "lunch":
             continue
         output.append(
-            TimeScheduleTS(
-                id=id,
-                title=title,
+            slot_entry(
+                id=period.id,
+                title=period.subject,
                 slotIds=[
                     f"s{x + 1 if not passLunch else x + 2}"
                     for x in range(timeslot, timeslot + duration)
                 ],
-                location=location,
-                overlapsBreak=True if duration >= 3 else False,
+                location=period.where,
+                overlapsBreak=duration >= 3,
             )
         )
         lastTimeslot = timeslot + duration
-    outFinal = [asdict(x) for x in output]
-    return outFinal, rawTimetable[1]
+    return output, rawTimetable[1]
 
 
 def get_special(
-    selectedRoom: dict[str, list[dict]], action: str
-) -> tuple[list[dict], str]:
+    selectedRoom: dict[str, tuple[Period, ...]], action: str
+) -> tuple[tuple[Period, ...], str]:
     if action[0:6] == "class-" and action[6:] in TIME_LOOKUP.values():
         return selectedRoom[action[6:]], "Normal"
-    for special in load_special():
-        if special["class name"] == action:
-            return special["schedule"], special["class name"]
-    return [], "Error"
+    special = load_special_templates().get(action)
+    if special is not None:
+        return special, action
+    return (), "Error"
 
 
-def build_by_date(room: Room, when: date) -> tuple[list[dict[str, Any]], list]:
-    events = load_event()
-    schedule = load_schedule()
-    selectedRoom = schedule[f"{room.class_}"][TIME_LOOKUP[when.isoweekday()]]
-    out: list = deepcopy(selectedRoom)
+def build_by_date(
+    room: Room, when: date, events: list[tuple[int, dict]] | None = None
+) -> tuple[tuple[Period, ...], list]:
+    # Templates are immutable and pre-sorted, so the day is returned by
+    # reference and overrides only build new tuples sharing the same periods.
+    if events is None:
+        events = load_event_index().on(when)
+    selectedRoom = load_templates()[f"{room.class_}"]
+    out = selectedRoom[TIME_LOOKUP[when.isoweekday()]]
     actionDid = []
-    for event in events:
-        if not event["date"] <= when <= event["date"] + timedelta(event["duration"]):
-            continue
+    matcher = load_audience_matcher()
+    roomKey = room.toKey()
+    roomTag = room.toTag()
+    for _, event in events:
         actions = event["actions"]
         for action in actions:
-            if not check_tag_strong(action["for"], room.toTag()):
+            if not matcher.check(action["audience"], action["for"], roomKey, roomTag):
                 continue
-            tem = get_special(
-                schedule[f"{room.class_}"],
-                action["with"],
-            )
+            tem = get_special(selectedRoom, action["with"])
             actionDid.append((action["action"], tem[1]))
             match action["action"]:
                 case "replace":
                     out = tem[0]
                 case "add":
-                    out.extend(out[0])
+                    out = tuple(sorted(out + tem[0], key=lambda x: x.timeslot))
                 case _:
                     pass
     return out, actionDid
@@ -111,6 +134,59 @@ def date_to_start_of_week(when: date) -> date:
     return when - timedelta(days=when.weekday())
 
 
+FIXED_WEEK = date_to_start_of_week(date(1970, 1, 1))
+
+
+def academic_year_range() -> tuple[date, date]:
+    academicYear = load_academic_info()["academicYear"]
+    return (
+        date.strptime(academicYear["start"], "%Y-%m-%d"),
+        date.strptime(academicYear["end"], "%Y-%m-%d"),
+    )
+
+
+def school_days(start: date, end: date) -> list[date]:
+    out = []
+    day = start
+    while day <= end:
+        if day.isoweekday() in TIME_LOOKUP:
+            out.append(day)
+        day += timedelta(days=1)
+    return out
+
+
+ResolvedDay = tuple[list[dict[str, Any]], list]
+
+
+def build_schedule_store() -> dict[tuple[str, str, str], dict[date, ResolvedDay]]:
+    # Resolve every (class, school day) of the academic year, plus the fixed
+    # week, once so the timetable routes only have to look the result up.
+    start, end = academic_year_range()
+    days = school_days(FIXED_WEEK, FIXED_WEEK + timedelta(days=4)) + school_days(start, end)
+    store = {}
+    for class_ in load_schedule():
+        f_class = get_class(class_)
+        if not f_class:
+            continue
+        room = Room(f_class["year"], f_class["department"], class_)
+        store[room.toKey()] = {
+            day: convert_timetable(build_by_date(room, day)) for day in days
+        }
+    return store
+
+
+@snapshot_cache
+def load_schedule_store() -> dict[tuple[str, str, str], dict[date, ResolvedDay]]:
+    return build_schedule_store()
+
+
+def resolve_day(room: Room, when: date) -> ResolvedDay:
+    resolved = load_schedule_store().get(room.toKey(), {}).get(when)
+    if resolved is None:
+        resolved = convert_timetable(build_by_date(room, when))
+    return resolved
+
+
 def week_schedule(
     room: Room, when: date
 ) -> tuple[dict[int, list[dict[str, Any]]], dict[int, list]]:
@@ -119,7 +195,7 @@ def week_schedule(
     outAction = {}
     for diff in range(5):
         eachDay = timedelta(days=diff) + startDate
-        tem = convert_timetable(build_by_date(room, eachDay))
+        tem = resolve_day(room, eachDay)
         output[diff + 1] = tem[0]
         outAction[diff + 1] = tem[1]
     return output, outAction
@@ -128,15 +204,80 @@ def week_schedule(
 def fixed_week_schedule(
     room: Room,
 ) -> tuple[dict[int, list[dict[str, Any]]], dict[int, list]]:
-    return week_schedule(room, date(1970, 1, 1))
+    return week_schedule(room, FIXED_WEEK)
+
+
+def week_schedules(
+    rooms: list[Room], when: date | None = None
+) -> dict[str, tuple[dict[int, list[dict[str, Any]]], dict[int, list]]]:
+    # Shared work is done once per day for all rooms: the store lookup covers
+    # most days, and the event window is only computed for days it misses.
+    startDate = date_to_start_of_week(FIXED_WEEK if when is None else when)
+    store = load_schedule_store()
+    dayEvents: dict[date, list[tuple[int, dict]]] = {}
+    output = {}
+    for room in rooms:
+        classDays = store.get(room.toKey(), {})
+        outDays = {}
+        outAction = {}
+        for diff in range(5):
+            eachDay = timedelta(days=diff) + startDate
+            tem = classDays.get(eachDay)
+            if tem is None:
+                if eachDay not in dayEvents:
+                    dayEvents[eachDay] = load_event_index().on(eachDay)
+                tem = convert_timetable(build_by_date(room, eachDay, dayEvents[eachDay]))
+            outDays[diff + 1] = tem[0]
+            outAction[diff + 1] = tem[1]
+        output[room.class_] = (outDays, outAction)
+    return output
 
 
 def get_slots() -> list[dict[str, Any]]:
     return load_slots()
 
 
+def range_schedule(
+    room: Room, start: date, end: date
+) -> Iterator[tuple[date, list[dict[str, Any]], list]]:
+    # Days come from the snapshot the range started on, even when consumed
+    # lazily; the event window is only computed (once) if the store misses.
+    snapshot = volumes.current()
+    with volumes.pinned(snapshot):
+        classDays = load_schedule_store().get(room.toKey(), {})
+    window: list[tuple[int, dict]] | None = None
+    for day in school_days(start, end):
+        tem = classDays.get(day)
+        if tem is None:
+            with volumes.pinned(snapshot):
+                if window is None:
+                    window = load_event_index().between(start, end)
+                dayEvents = [
+                    (idx, event)
+                    for idx, event in window
+                    if event["date"] <= day < event["date"] + timedelta(days=event.get("duration", 1))
+                ]
+                tem = convert_timetable(build_by_date(room, day, dayEvents))
+        yield day, tem[0], tem[1]
+
+
+def list_classes(grade: int | None = None, department: str | None = None) -> list[str]:
+    return [
+        class_
+        for year, departments in load_info()["classes"].items()
+        if grade is None or year == str(grade)
+        for dep, rooms in departments.items()
+        if department is None or dep == department
+        for class_ in rooms
+    ]
+
+
+def has_timetable(room: str) -> bool:
+    return room in load_templates()
+
+
 def get_class(room: str) -> dict[str, Any]:
-    for year, departments in CLASSES_LOOKUP.items():
+    for year, departments in load_info()["classes"].items():
         for department, rooms in departments.items():
             if room in rooms:
                 return {"department": department, "year": year}
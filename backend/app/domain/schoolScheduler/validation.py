@@ -0,0 +1,83 @@
+from datetime import date
+from typing import Any
+
+from app.schemas.types import TIME_LOOKUP
+
+
+def parse_date(value: Any) -> date | None:
+    try:
+        return date.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_volumes(files: dict[str, Any]) -> list[str]:
+    """Referential integrity checks across the volumes files.
+
+    Returns one message per problem, so an empty list means the files are
+    consistent enough to build a snapshot from.
+    """
+    problems: list[str] = []
+    info = files["info.json"]
+    timetables = files["timetables.json"]
+    slotIds = {slot["id"] for slot in files["slots.json"]}
+    specials = {special["class name"] for special in files["special.json"]}
+    weekdays = set(TIME_LOOKUP.values())
+
+    infoClasses = {
+        class_
+        for departments in info["classes"].values()
+        for department, classes in departments.items()
+        for class_ in classes
+    }
+    for departments in info["classes"].values():
+        for department in departments:
+            if department not in info["departments"]:
+                problems.append(f"info.json: unknown department {department!r}")
+
+    for required in ("s1", "s6"):
+        if required not in slotIds:
+            problems.append(f"slots.json: missing slot {required!r} (SHR/lunch)")
+
+    def check_periods(where: str, periods: list[dict[str, Any]]) -> None:
+        for period in periods:
+            if "id" not in period or not isinstance(period.get("timeslot"), int):
+                problems.append(f"{where}: period needs an id and an integer timeslot")
+                continue
+            offset = 2 if period["timeslot"] > 4 else 1
+            for x in range(period["timeslot"], period["timeslot"] + period.get("duration", 1)):
+                if f"s{x + offset}" not in slotIds:
+                    problems.append(f"{where}: {period['id']} uses missing slot s{x + offset}")
+
+    for class_, days in timetables.items():
+        if class_ not in infoClasses:
+            problems.append(f"timetables.json: class {class_!r} is not in info.json")
+        for day, periods in days.items():
+            if day not in weekdays:
+                problems.append(f"timetables.json: {class_} has unknown day {day!r}")
+            check_periods(f"timetables.json: {class_} {day}", periods)
+    for special in files["special.json"]:
+        check_periods(f"special.json: {special['class name']}", special["schedule"])
+
+    for idx, event in enumerate(files["override.json"]):
+        where = f"override.json: event {idx} ({event.get('event', '?')})"
+        if parse_date(event.get("date")) is None:
+            problems.append(f"{where}: invalid date {event.get('date')!r}")
+        if not isinstance(event.get("duration", 1), int) or event.get("duration", 1) < 1:
+            problems.append(f"{where}: duration must be a positive integer")
+        for action in event.get("actions", []):
+            target = action.get("with", "")
+            isWeekday = target[0:6] == "class-" and target[6:] in weekdays
+            if not isWeekday and target not in specials:
+                problems.append(f"{where}: 'with' target {target!r} is not in special.json")
+            if not isinstance(action.get("for"), list):
+                problems.append(f"{where}: action needs a 'for' list")
+
+    academicYear = files["academicInfo.json"].get("academicYear", {})
+    start = parse_date(academicYear.get("start"))
+    end = parse_date(academicYear.get("end"))
+    if start is None or end is None:
+        problems.append("academicInfo.json: academicYear needs valid start and end dates")
+    elif start > end:
+        problems.append("academicInfo.json: academicYear starts after it ends")
+    return problems
@@ -1,2 +1,3 @@
 from app.domain.user.auth import get_user_by_email, get_user_perms, upsert_user_from_oauth, OAuthAccountConflict  # noqa : F401
 from app.models import OAuthAccount, User  # noqa : F401
+from app.domain.user.people import PEOPLE_FIELDS, search_people, setup_people_search  # noqa : F401
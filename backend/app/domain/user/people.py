@@ -0,0 +1,171 @@
+from typing import Any
+
+from sqlalchemy import Connection, Integer, and_, cast, column, func, literal, literal_column, or_, table, text
+from sqlmodel import Session, select
+
+from app.domain.common import decode_cursor, encode_cursor, fts5_query
+from app.models import User
+
+# What the directory list shows; tags, timestamps and tokens stay behind.
+PEOPLE_FIELDS = (
+    "id",
+    "name",
+    "personnelID",
+    "email",
+    "image",
+    "role",
+    "year",
+    "department",
+    "class_",
+)
+SEARCH_COLUMNS = ("name", "personnelID")
+
+
+def setup_people_search(connection: Connection) -> None:
+    """Create the index behind search_people for the connected database, if missing."""
+    if connection.dialect.name == "postgresql":
+        # Trigram indexes serve the ILIKE '%query%' match and the ranking.
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name in SEARCH_COLUMNS:
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_user_{name.lower()}_trgm "
+                    f'ON "user" USING GIN ("{name}" gin_trgm_ops)'
+                )
+            )
+    elif connection.dialect.name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'user_fts'")
+        ).first()
+        if exists:
+            return
+        connection.execute(
+            text(
+                "CREATE VIRTUAL TABLE user_fts USING fts5("
+                "name, personnelID, content='user', content_rowid='rowid')"
+            )
+        )
+        # Keep the external-content table in sync with user.
+        connection.execute(
+            text(
+                'CREATE TRIGGER user_fts_insert AFTER INSERT ON "user" BEGIN '
+                "INSERT INTO user_fts(rowid, name, personnelID) "
+                "VALUES (new.rowid, new.name, new.personnelID); END"
+            )
+        )
+        connection.execute(
+            text(
+                'CREATE TRIGGER user_fts_delete AFTER DELETE ON "user" BEGIN '
+                "INSERT INTO user_fts(user_fts, rowid, name, personnelID) "
+                "VALUES ('delete', old.rowid, old.name, old.personnelID); END"
+            )
+        )
+        connection.execute(
+            text(
+                'CREATE TRIGGER user_fts_update AFTER UPDATE ON "user" BEGIN '
+                "INSERT INTO user_fts(user_fts, rowid, name, personnelID) "
+                "VALUES ('delete', old.rowid, old.name, old.personnelID); "
+                "INSERT INTO user_fts(rowid, name, personnelID) "
+                "VALUES (new.rowid, new.name, new.personnelID); END"
+            )
+        )
+        connection.execute(text("INSERT INTO user_fts(user_fts) VALUES ('rebuild')"))
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_clauses(session: Session, query: str) -> tuple[list[Any], Any, Any] | None:
+    """(joins, where clause, rank) for people matching query, or None if nothing can.
+
+    The rank is an integer, higher is better, so it round-trips through cursors
+    exactly.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        pattern = f"%{escape_like(query)}%"
+        match = or_(
+            *[getattr(User, name).ilike(pattern, escape="\\") for name in SEARCH_COLUMNS]
+        )
+        score = func.greatest(
+            *[func.word_similarity(query, getattr(User, name)) for name in SEARCH_COLUMNS]
+        )
+        return [], match, cast(func.round(score * 1000), Integer)
+    if dialect == "sqlite":
+        # Tokenized: every word of the query must start a word of the name or
+        # personnel ID.
+        words = fts5_query(query)
+        if not words:
+            return None
+        fts = table("user_fts", column("rowid"))
+        join = (fts, fts.c.rowid == literal_column('"user".rowid'))
+        match = literal_column("user_fts").op("MATCH")(words)
+        score = -func.bm25(literal_column("user_fts"))
+        return [join], match, cast(func.round(score * 1000), Integer)
+    raise NotImplementedError(f"People search is not set up for {dialect}")
+
+
+def search_people(
+    session: Session,
+    query: str | None = None,
+    grade: int | None = None,
+    department: str | None = None,
+    class_: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """People in the directory, best match first when searching, else by name.
+
+    With a limit, returns one page and the cursor for the next one, if any.
+    Raises ValueError for a malformed cursor.
+    """
+    sortName = func.coalesce(User.name, "")
+    rank: Any = literal(0, Integer)
+    statement = select(
+        *[getattr(User, name).label(name) for name in PEOPLE_FIELDS],
+        sortName.label("sort_name"),
+    )
+    clauses = None
+    if query is not None and query.strip():
+        clauses = search_clauses(session, query.strip())
+        if clauses is None:
+            return [], None
+        joins, match, rank = clauses
+        for target, onclause in joins:
+            statement = statement.join(target, onclause)
+        statement = statement.where(match)
+    statement = statement.add_columns(rank.label("rank"))
+    if grade is not None:
+        statement = statement.where(User.year == grade)
+    if department is not None:
+        statement = statement.where(User.department == department)
+    if class_ is not None:
+        statement = statement.where(User.class_ == class_)
+    order = [sortName.asc(), User.id.asc()]  # type: ignore
+    if clauses is not None:
+        order.insert(0, rank.desc())
+    statement = statement.order_by(*order)
+    if cursor is not None:
+        lastRank, lastName, lastId = decode_cursor(cursor, int, str, str)
+        statement = statement.where(
+            or_(
+                rank < lastRank,
+                and_(
+                    rank == lastRank,
+                    or_(
+                        sortName > lastName,
+                        and_(sortName == lastName, User.id > lastId),  # type: ignore
+                    ),
+                ),
+            )
+        )
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    rows = list(session.exec(statement).all())
+    nextCursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        nextCursor = encode_cursor(last.rank, last.sort_name, last.id)
+    return [{name: row._mapping[name] for name in PEOPLE_FIELDS} for row in rows], nextCursor
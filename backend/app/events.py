@@ -0,0 +1,228 @@
+"""In-process fan-out of change events to Server-Sent Events clients."""
+
+import asyncio
+import contextlib
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable
+
+import psycopg2
+
+logger = logging.getLogger("uvicorn.error")
+
+# Per-client buffer; a client that falls this far behind is told to resync
+# instead of holding memory for it.
+QUEUE_SIZE = 100
+CHANNEL = "schooler_events"
+# Events waiting for the notifier thread; more than this are dropped.
+OUTBOX_SIZE = 1000
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+NOTIFIER_STOP_SECONDS = 5
+# TCP keepalives make a silently dropped connection fail instead of hanging.
+CONNECT_OPTIONS = {
+    "connect_timeout": 5,
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+}
+
+Event = dict[str, Any]
+
+
+class MemoryBackend:
+    """Delivers events within this process only; for a single worker and tests."""
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        self.deliver = deliver
+        self.loop = asyncio.get_running_loop()
+
+    def publish(self, event: Event) -> None:
+        self.loop.call_soon_threadsafe(self.deliver, event)
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresBackend:
+    """Shares events between workers through Postgres LISTEN/NOTIFY.
+
+    Both connections are re-opened after the database restarts or drops
+    them. Subscribers are told to resync after a reconnect, since anything
+    sent in between was missed.
+    """
+
+    def __init__(self, dsn: str, channel: str = CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self.outbox: queue.Queue[Event | None] = queue.Queue(maxsize=OUTBOX_SIZE)
+
+    async def start(self, deliver: Callable[[Event], None]) -> None:
+        self.deliver = deliver
+        self.loop = asyncio.get_running_loop()
+        self.lost = asyncio.Event()
+        self.listener = asyncio.create_task(self.listen())
+        self.notifier = threading.Thread(
+            target=self.notify_loop, name="events-notify", daemon=True
+        )
+        self.notifier.start()
+
+    def connect(self):
+        connection = psycopg2.connect(self.dsn, **CONNECT_OPTIONS)
+        connection.autocommit = True
+        return connection
+
+    def connect_and_listen(self):
+        connection = self.connect()
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return connection
+
+    async def listen(self) -> None:
+        delay = RECONNECT_MIN_SECONDS
+        reconnecting = False
+        while True:
+            try:
+                self.listenConnection = await asyncio.to_thread(self.connect_and_listen)
+            except psycopg2.Error:
+                logger.exception("-> Could not listen for events, retrying in %ss.", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                continue
+            delay = RECONNECT_MIN_SECONDS
+            fileno = self.listenConnection.fileno()
+            self.lost.clear()
+            self.loop.add_reader(fileno, self.receive)
+            if reconnecting:
+                logger.info("-> Listening for events again.")
+                self.deliver({"type": "resync"})
+            reconnecting = True
+            try:
+                await self.lost.wait()
+            finally:
+                self.loop.remove_reader(fileno)
+                self.listenConnection.close()
+
+    def receive(self) -> None:
+        try:
+            self.listenConnection.poll()
+        except psycopg2.Error:
+            logger.warning("-> Lost the events connection, reconnecting.")
+            self.lost.set()
+            return
+        while self.listenConnection.notifies:
+            notify = self.listenConnection.notifies.pop(0)
+            try:
+                self.deliver(json.loads(notify.payload))
+            except ValueError:
+                logger.warning("-> Ignoring malformed event %r.", notify.payload)
+
+    def publish(self, event: Event) -> None:
+        # Called from request threads right after a commit, so it only queues;
+        # the notifier thread does the database I/O.
+        try:
+            self.outbox.put_nowait(event)
+        except queue.Full:
+            logger.warning("-> Dropping event %r, the notifier is behind.", event)
+
+    def notify_loop(self) -> None:
+        connection = None
+        while (event := self.outbox.get()) is not None:
+            # One retry on a fresh connection covers a restarted database.
+            for attempt in range(2):
+                try:
+                    if connection is None or connection.closed:
+                        connection = self.connect()
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            "SELECT pg_notify(%s, %s)", (self.channel, json.dumps(event))
+                        )
+                    break
+                except psycopg2.Error:
+                    if connection is not None:
+                        connection.close()
+                    connection = None
+                    if attempt:
+                        logger.exception("-> Could not publish event %r.", event)
+        if connection is not None:
+            connection.close()
+
+    async def stop(self) -> None:
+        self.listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.listener
+        await asyncio.to_thread(self.outbox.put, None)
+        await asyncio.to_thread(self.notifier.join, NOTIFIER_STOP_SECONDS)
+
+
+Backend = MemoryBackend | PostgresBackend
+
+
+class Broadcaster:
+    """Hands each event to the bounded queue of every subscriber that accepts it."""
+
+    def __init__(self) -> None:
+        self.subscribers: dict[asyncio.Queue[Event], Callable[[Event], bool] | None] = {}
+        self.backend: Backend | None = None
+
+    def deliver(self, event: Event) -> None:
+        # Runs on the event loop.
+        for subscriber, accepts in self.subscribers.items():
+            if accepts is not None and not accepts(event):
+                continue
+            try:
+                subscriber.put_nowait(event)
+            except asyncio.QueueFull:
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait({"type": "resync"})
+
+    def subscribe(
+        self, accepts: Callable[[Event], bool] | None = None
+    ) -> "asyncio.Queue[Event]":
+        """A queue of the events accepts returns true for, or of every event."""
+        subscriber: asyncio.Queue[Event] = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers[subscriber] = accepts
+        return subscriber
+
+    def unsubscribe(self, subscriber: "asyncio.Queue[Event]") -> None:
+        self.subscribers.pop(subscriber, None)
+
+
+broadcaster = Broadcaster()
+
+
+async def start(backend: Backend) -> None:
+    await backend.start(broadcaster.deliver)
+    broadcaster.backend = backend
+
+
+async def stop() -> None:
+    backend, broadcaster.backend = broadcaster.backend, None
+    if backend is not None:
+        await backend.stop()
+
+
+def publish(event: Event) -> None:
+    """Send an event to subscribers in every worker; safe from any thread.
+
+    A no-op until start() is called, so scripts can share code with the app.
+    """
+    if broadcaster.backend is not None:
+        broadcaster.backend.publish(event)
+
+
+def publish_local(event: Event) -> None:
+    """Send an event to this worker's subscribers only, from the event loop."""
+    broadcaster.deliver(event)
+
+
+def create_backend(name: str, dsn: str) -> Backend:
+    if name == "postgres":
+        return PostgresBackend(dsn)
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown events backend {name!r}")
@@ -0,0 +1,147 @@
+"""Versioned schema migrations for databases created by older releases.
+
+create_all only creates missing tables, so columns and indexes added to
+existing tables are applied here, once each, in version order. Every
+migration checks before it changes anything, so a fresh database (which
+create_all has already brought up to date) just records them as applied.
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Connection, Engine, insert, inspect, text
+from sqlmodel import SQLModel, select
+
+from app.domain.cardAnno.anno import backfill_change_versions, setup_change_feed
+from app.domain.cardAnno.search import backfill_search_text, setup_search
+from app.domain.user.people import setup_people_search
+from app.models import Announcement, AnnouncementAudience, DataVersion, SchemaMigration, User
+
+logger = logging.getLogger("uvicorn.error")
+
+# Serializes migrations between workers starting at the same time.
+ADVISORY_LOCK_ID = 724001
+
+Migration = Callable[[Connection], None]
+
+
+def add_column(connection: Connection, table_name: str, column_name: str, definition: str) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name not in columns:
+        connection.execute(
+            text(f'ALTER TABLE "{table_name}" ADD COLUMN "{column_name}" {definition}')
+        )
+
+
+def create_index(connection: Connection, name: str) -> None:
+    """Create an index declared on the models, if missing."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name == name:
+                index.create(connection, checkfirst=True)
+                return
+    raise KeyError(f"No index named {name!r} on the models")
+
+
+def announcement_search(connection: Connection) -> None:
+    add_column(connection, "announcement", "search_text", "TEXT")
+    setup_search(connection)
+    backfill_search_text(connection)
+
+
+def announcement_delta_sync(connection: Connection) -> None:
+    setup_change_feed(connection)
+    DataVersion.__table__.create(connection, checkfirst=True)  # type: ignore
+    seeded = set(connection.execute(select(DataVersion.table_name)).scalars())
+    for model in (Announcement, User):
+        if model.__tablename__ not in seeded:
+            connection.execute(insert(DataVersion).values(table_name=model.__tablename__))
+    backfill_change_versions(connection)
+
+
+def announcement_audience(connection: Connection) -> None:
+    # Announcements without an audience are visible to everyone, so existing
+    # rows need no backfill.
+    add_column(connection, "announcement", "audience", "TEXT")
+    AnnouncementAudience.__table__.create(connection, checkfirst=True)  # type: ignore
+    create_index(connection, "ix_announcementaudience_announcement_id")
+
+
+def people_search(connection: Connection) -> None:
+    setup_people_search(connection)
+
+
+def filter_indexes(connection: Connection) -> None:
+    create_index(connection, "ix_user_year_department_class")
+    create_index(connection, "ix_announcement_date")
+    # Fails if an account was already linked twice; the duplicates must be
+    # removed by hand first.
+    create_index(connection, "ix_oauthaccount_provider_account")
+
+
+def announcement_change_backfill(connection: Connection) -> None:
+    # Databases that ran announcement_delta_sync before it backfilled still
+    # have announcements at change version 0.
+    backfill_change_versions(connection)
+
+
+def people_class_index(connection: Connection) -> None:
+    # /people is mostly filtered by class_ alone, which cannot use
+    # ix_user_year_department_class.
+    create_index(connection, "ix_user_class_")
+
+
+# Append only: a released version must never be renumbered or changed.
+MIGRATIONS: list[tuple[int, str, Migration]] = [
+    (1, "announcement_search", announcement_search),
+    (2, "announcement_delta_sync", announcement_delta_sync),
+    (3, "announcement_audience", announcement_audience),
+    (4, "people_search", people_search),
+    (5, "filter_indexes", filter_indexes),
+    (6, "people_class_index", people_class_index),
+    (7, "announcement_change_backfill", announcement_change_backfill),
+]
+
+
+def applied_versions(connection: Connection) -> set[int]:
+    SchemaMigration.__table__.create(connection, checkfirst=True)  # type: ignore
+    return set(connection.execute(select(SchemaMigration.version)).scalars())
+
+
+def pending(engine: Engine) -> list[tuple[int, str]]:
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+        connection.commit()
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(engine: Engine, target: int | None = None) -> list[int]:
+    """Apply every pending migration up to target, each in its own transaction.
+
+    Returns the versions applied.
+    """
+    done: list[int] = []
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        try:
+            applied = applied_versions(connection)
+            connection.commit()
+            for version, name, migration in MIGRATIONS:
+                if version in applied or (target is not None and version > target):
+                    continue
+                logger.info("-> Applying migration %d (%s).", version, name)
+                with connection.begin():
+                    migration(connection)
+                    connection.execute(
+                        SchemaMigration.__table__.insert().values(  # type: ignore
+                            version=version, name=name, applied_at=datetime.utcnow()
+                        )
+                    )
+                done.append(version)
+        finally:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                connection.commit()
+    return done
@@ -3,6 +3,7 @@
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.schemas.types import RoleEnum
@@ -18,7 +19,7 @@ class User(SQLModel, table=True):
     role: Optional[RoleEnum] = None
     year: Optional[int] = None
     department: Optional[str] = None
-    class_: Optional[str] = None
+    class_: Optional[str] = Field(default=None, index=True)
     name: Optional[str] = None
     image: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -28,6 +29,16 @@ class User(SQLModel, table=True):
     announcements: List["Announcement"] = Relationship(back_populates="author")
 
 
+# The /people grade and department filters; class_ alone, the common case,
+# has its own index.
+Index(
+    "ix_user_year_department_class",
+    User.year,  # type: ignore
+    User.department,  # type: ignore
+    User.class_,  # type: ignore
+)
+
+
 class OAuthAccount(SQLModel, table=True):
     """OAuth account model for third-party authentication."""
 
@@ -43,6 +54,16 @@ class OAuthAccount(SQLModel, table=True):
     user: "User" = Relationship(back_populates="accounts")
 
 
+# Sign-in looks accounts up by these; unique so concurrent sign-ins cannot
+# link the same account twice.
+Index(
+    "ix_oauthaccount_provider_account",
+    OAuthAccount.provider,  # type: ignore
+    OAuthAccount.provider_account_id,  # type: ignore
+    unique=True,
+)
+
+
 class Announcement(SQLModel, table=True):
     """Announcement model for school news and updates."""
 
@@ -53,5 +74,51 @@ class Announcement(SQLModel, table=True):
     thumbnail: Optional[str] = None
     author_id: str = Field(foreign_key="user.id")
     author: "User" = Relationship(back_populates="announcements")
-    date: str
+    date: str = Field(index=True)
     priority: int
+    # Plain text of content, maintained by cardAnno for full-text search.
+    search_text: Optional[str] = None
+    # DataVersion of the announcement table at this row's last write, for
+    # delta sync; deleted rows stay behind as tombstones.
+    change_version: int = Field(default=0, index=True)
+    deleted: bool = False
+    # JSON list of tag groups, in the same form as a volumes action's "for";
+    # None for announcements from before audiences, which everyone sees.
+    audience: Optional[str] = None
+
+
+# Keyset pagination order of the announcement listings, see cardAnno.anno.
+Index(
+    "ix_announcement_feed_order",
+    Announcement.priority,  # type: ignore
+    Announcement.date.desc(),  # type: ignore
+    Announcement.id.desc(),  # type: ignore
+)
+
+
+class AnnouncementAudience(SQLModel, table=True):
+    """Visibility index: one row per audience_key of an announcement.
+
+    The primary key leads with tag, so finding what a viewer may see is an
+    index lookup on their viewer_keys.
+    """
+
+    tag: str = Field(primary_key=True)
+    announcement_id: int = Field(
+        foreign_key="announcement.id", primary_key=True, index=True
+    )
+
+
+class SchemaMigration(SQLModel, table=True):
+    """A migration from app.migrations that has been applied."""
+
+    version: int = Field(primary_key=True)
+    name: str
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DataVersion(SQLModel, table=True):
+    """Change counter per table, bumped in the same transaction as each write."""
+
+    table_name: str = Field(primary_key=True)
+    version: int = 0
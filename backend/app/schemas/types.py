@@ -4,16 +4,12 @@ from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel
-from pathlib import Path
-import json
-from functools import cache
 
-@cache
+from app import volumes
+
+
 def load_info():
-    file_path = Path(__file__).parent.parent.parent / "volumes" / "info.json"
-    with open(file_path) as file:
-        out = json.loads(file.read())
-    return out
+    return volumes.current().files["info.json"]
 
 
 class OAuthUpsertIn(BaseModel):
@@ -33,11 +29,6 @@ class RoleEnum(str, Enum):
 
 TIME_LOOKUP = {1: "Monday", 2: "Tuesday", 3: "Wednesday", 4: "Thursday", 5: "Friday"}
 
-info = load_info()
-DEPARTMENT = info["departments"]
-GRADE_LOOKUP = info["grades"]
-CLASSES_LOOKUP = info["classes"]
-
 class OverrideType(Enum):
     CLASS = "class"
     HOLIDAY = "holiday"
@@ -47,6 +38,15 @@ class OverrideType(Enum):
     BREAK = "break"
 
 
+@dataclass(frozen=True, slots=True)
+class Period:
+    id: str
+    timeslot: int
+    subject: str = ""
+    where: str = ""
+    duration: int = 1
+
+
 @dataclass
 class TimeScheduleTS:
     id: str
@@ -68,6 +68,9 @@ class Room:
     def toTag(self) -> list[str]:
         return [f"year{self.year}", self.department, f"class-{self.class_}"]
 
+    def toKey(self) -> tuple[str, str, str]:
+        return str(self.year), self.department, self.class_
+
 
 def room_from_tag(tags: list[str]) -> Room:
     outRoom = Room(0, "None", "class-C2R1")
@@ -75,7 +78,7 @@ def room_from_tag(tags: list[str]) -> Room:
         if tag[:4] == "year":
             outRoom.year = int(tag[4:])
             continue
-        if tag in DEPARTMENT:
+        if tag in load_info()["departments"]:
             outRoom.department = tag
             continue
         if tag[:6] == "class-":
@@ -129,6 +132,7 @@ class AnnouncementReturn:
     authorImage: Optional[str]
     date: str
     priority: int
+    audience: Optional[list[list[str]]] = None
 
 
 class AnnouncementCreate(BaseModel):
@@ -137,6 +141,7 @@ class AnnouncementCreate(BaseModel):
     content: Optional[str] = None
     thumbnail: Optional[str] = None
     priority: int
+    audience: Optional[list[list[str]]] = None
 
 
 class AnnouncementUpdate(BaseModel):
@@ -145,3 +150,4 @@ class AnnouncementUpdate(BaseModel):
     content: Optional[str] = None
     thumbnail: Optional[str] = None
     priority: Optional[int] = None
+    audience: Optional[list[list[str]]] = None
@@ -0,0 +1,255 @@
+"""Versioned snapshots of the JSON data in volumes/ with hot reload."""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache, wraps
+from os import getenv
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, TypeVar
+
+from watchfiles import awatch
+
+logger = logging.getLogger("uvicorn.error")
+
+# Overridable so benchmarks and tools can point the app at generated data.
+VOLUMES_DIR = Path(getenv("VOLUMES_DIR", Path(__file__).parent.parent / "volumes"))
+FILES = (
+    "info.json",
+    "timetables.json",
+    "slots.json",
+    "special.json",
+    "override.json",
+    "academicInfo.json",
+    "resources.json",
+)
+# Precompiled snapshot written by compile_volumes.py, see write_compiled().
+COMPILED_FILE = "snapshot.bin"
+COMPILED_FORMAT = 1
+# Sources of the code that builds the derived data in a compiled snapshot,
+# relative to app/. Their digest is stored with the snapshot, so a deploy that
+# changes any of them rebuilds the derived data instead of loading it.
+COMPILED_SOURCES = ("volumes.py", "domain/schoolScheduler", "domain/common")
+
+T = TypeVar("T")
+
+
+class Snapshot:
+    """One consistent, read-only view of every volumes file.
+
+    Data derived from the files (indexes, the resolved schedule store, ...) is
+    memoized on the snapshot it was built from, so swapping snapshots swaps
+    every derived structure with it.
+
+    version only orders snapshots within this process; digest identifies the
+    file contents and is the same across workers and restarts.
+    """
+
+    def __init__(self, version: int, files: dict[str, Any], digest: str = ""):
+        self.version = version
+        self.digest = digest
+        self.files: Mapping[str, Any] = MappingProxyType(files)
+        self.derived: dict[str, Any] = {}
+        self.lock = threading.RLock()
+
+
+_versions = itertools.count(1)
+_current: Snapshot | None = None
+_currentLock = threading.Lock()
+_pinned: ContextVar[Snapshot | None] = ContextVar("pinned_snapshot", default=None)
+
+
+def read_files(directory: Path = VOLUMES_DIR) -> dict[str, Any]:
+    files = {}
+    for name in FILES:
+        with open(directory / name) as file:
+            files[name] = json.loads(file.read())
+    return files
+
+
+def file_digests(directory: Path = VOLUMES_DIR) -> dict[str, str]:
+    return {
+        name: hashlib.sha256((directory / name).read_bytes()).hexdigest()
+        for name in FILES
+    }
+
+
+def content_digest(digests: dict[str, str]) -> str:
+    return hashlib.sha256(
+        "".join(f"{name}:{digests[name]}\n" for name in FILES).encode()
+    ).hexdigest()[:16]
+
+
+@cache
+def code_digest() -> str:
+    appDir = Path(__file__).parent
+    digest = hashlib.sha256()
+    for source in COMPILED_SOURCES:
+        path = appDir / source
+        for file in sorted(path.rglob("*.py")) if path.is_dir() else [path]:
+            digest.update(f"{file.relative_to(appDir)}\n".encode())
+            digest.update(file.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def intern_strings(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [intern_strings(x) for x in value]
+    if isinstance(value, dict):
+        return {sys.intern(k): intern_strings(v) for k, v in value.items()}
+    return value
+
+
+def write_compiled(snapshot: Snapshot, directory: Path = VOLUMES_DIR) -> Path:
+    """Write a snapshot and its derived data as one pickle next to the JSON.
+
+    The digests of the JSON files and of the code it was built from are
+    stored with it, so a stale file is ignored once either is changed.
+    """
+    path = directory / COMPILED_FILE
+    payload = {
+        "format": COMPILED_FORMAT,
+        "code": code_digest(),
+        "digests": file_digests(directory),
+        "files": dict(snapshot.files),
+        "derived": snapshot.derived,
+    }
+    tmpPath = path.with_suffix(".tmp")
+    with open(tmpPath, "wb") as file:
+        pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmpPath, path)
+    return path
+
+
+def read_compiled(
+    directory: Path = VOLUMES_DIR, digests: dict[str, str] | None = None
+) -> tuple[dict[str, Any], dict[str, Any]] | None:
+    # Only ever loaded from the operator-controlled volumes directory.
+    path = directory / COMPILED_FILE
+    if digests is None:
+        digests = file_digests(directory)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as file:
+            payload = pickle.load(file)
+    except Exception:
+        logger.warning("-> Ignoring unreadable %s.", path)
+        return None
+    if (
+        payload.get("format") != COMPILED_FORMAT
+        or payload.get("code") != code_digest()
+        or payload.get("digests") != digests
+    ):
+        logger.info("-> %s is stale, loading the JSON files instead.", path)
+        return None
+    return payload["files"], payload["derived"]
+
+
+@contextmanager
+def pinned(snapshot: Snapshot) -> Iterator[Snapshot]:
+    """Make current() return the given snapshot inside the block."""
+    token = _pinned.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _pinned.reset(token)
+
+
+def build_snapshot(warmup: Callable[[], None] | None = None) -> Snapshot:
+    digests = file_digests()
+    compiled = read_compiled(digests=digests)
+    if compiled is None:
+        snapshot = Snapshot(next(_versions), read_files(), content_digest(digests))
+    else:
+        snapshot = Snapshot(next(_versions), compiled[0], content_digest(digests))
+        snapshot.derived.update(compiled[1])
+    if warmup is not None:
+        # Build the derived data against the new snapshot before anyone can
+        # see it; any error here leaves the current snapshot in place.
+        with pinned(snapshot):
+            warmup()
+    return snapshot
+
+
+def current() -> Snapshot:
+    """The snapshot readers should use right now."""
+    global _current
+    pinnedSnapshot = _pinned.get()
+    if pinnedSnapshot is not None:
+        return pinnedSnapshot
+    snapshot = _current
+    if snapshot is None:
+        with _currentLock:
+            if _current is None:
+                _current = build_snapshot()
+            snapshot = _current
+    return snapshot
+
+
+def snapshot_cache(func: Callable[[], T]) -> Callable[[], T]:
+    """Like functools.cache for zero-argument loaders, but memoized per snapshot."""
+    key = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper() -> T:
+        snapshot = current()
+        try:
+            return snapshot.derived[key]
+        except KeyError:
+            pass
+        with snapshot.lock:
+            if key not in snapshot.derived:
+                with pinned(snapshot):
+                    snapshot.derived[key] = func()
+            return snapshot.derived[key]
+
+    return wrapper
+
+
+def load(warmup: Callable[[], None] | None = None) -> Snapshot:
+    """Build and publish the first snapshot, failing loudly on bad data."""
+    global _current
+    snapshot = build_snapshot(warmup)
+    _current = snapshot
+    return snapshot
+
+
+def reload(warmup: Callable[[], None] | None = None) -> Snapshot | None:
+    """Re-read the volumes and swap in a new snapshot if it is valid."""
+    global _current
+    try:
+        snapshot = build_snapshot(warmup)
+    except Exception:
+        logger.exception("-> Volumes reload failed, keeping version %s.", current().version)
+        return None
+    _current = snapshot
+    logger.info("-> Volumes reloaded as version %s.", snapshot.version)
+    return snapshot
+
+
+async def watch(
+    warmup: Callable[[], None] | None = None,
+    on_reload: Callable[[Snapshot], None] | None = None,
+) -> None:
+    """Reload the volumes in the background whenever one of the files changes.
+
+    on_reload is called on the event loop with each snapshot swapped in.
+    """
+    async for _ in awatch(
+        VOLUMES_DIR, watch_filter=lambda change, path: Path(path).name in FILES
+    ):
+        snapshot = await asyncio.to_thread(reload, warmup)
+        if snapshot is not None and on_reload is not None:
+            on_reload(snapshot)
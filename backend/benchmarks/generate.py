@@ -0,0 +1,137 @@
+"""Generate a synthetic large-school volumes directory for benchmarking.
+
+Usage:
+    python benchmarks/generate.py /tmp/big-school --classes 500 --overrides 5000
+"""
+
+import argparse
+import json
+import random
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+
+VOLUMES_DIR = Path(__file__).parent.parent / "volumes"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+DEPARTMENTS = [
+    "Computer Engineering",
+    "Mechatronics Engineering",
+    "Electrical and Electronics Engineering",
+    "Civil Engineering",
+    "Chemical Engineering",
+]
+SUBJECTS = [
+    "Calculus", "Physics", "Chemistry", "Programming", "English", "Japanese",
+    "Linear Algebra", "Circuits", "Networks", "Statics", "Thermodynamics",
+    "Health & Physical Education", "Social Studies", "Thai", "Drawing",
+]
+EVENT_TYPES = ["class", "holiday", "exam", "event", "other"]
+
+
+def generate_info(classes: int, grades: int) -> tuple[dict, list[tuple[str, str, str]]]:
+    rooms = []
+    info = {
+        "departments": DEPARTMENTS,
+        "grades": {str(g): f"Year {g}" for g in range(1, grades + 1)},
+        "classes": {},
+    }
+    for idx in range(classes):
+        grade = str(idx % grades + 1)
+        department = DEPARTMENTS[idx // grades % len(DEPARTMENTS)]
+        class_ = f"{department[:2].upper()}{grade}R{idx // (grades * len(DEPARTMENTS)) + 1}"
+        info["classes"].setdefault(grade, {}).setdefault(department, []).append(class_)
+        rooms.append((grade, department, class_))
+    return info, rooms
+
+
+def generate_day(rng: random.Random, rooms: list[str]) -> list[dict]:
+    periods = []
+    timeslot = 1
+    while timeslot <= 10:
+        duration = rng.choice([1, 2, 2, 2, 3])
+        if timeslot <= 4 < timeslot + duration - 1:
+            duration = 5 - timeslot
+        if timeslot + duration - 1 > 10:
+            break
+        if rng.random() < 0.85:
+            subject = rng.choice(SUBJECTS)
+            periods.append(
+                {
+                    "id": f"{subject.lower().replace(' ', '')}{rng.randint(1, 4)}",
+                    "timeslot": timeslot,
+                    "subject": subject,
+                    "where": rng.choice(rooms),
+                    "duration": duration,
+                }
+            )
+        timeslot += duration
+    return periods
+
+
+def generate_overrides(
+    rng: random.Random, count: int, start: date, end: date, rooms: list[tuple[str, str, str]]
+) -> list[dict]:
+    span = (end - start).days
+    events = []
+    for _ in range(count):
+        grade, department, class_ = rng.choice(rooms)
+        audience = rng.choice(
+            [
+                [["all-classes"]],
+                [[f"year{grade}", department, f"class-{class_}", "exchange"]],
+                [[f"year{grade}", department, f"class-{class_}", "exchange"], ["all-classes"]],
+            ]
+        )
+        target = rng.choice(["no-class", "no-class-Exam", f"class-{rng.choice(WEEKDAYS)}"])
+        events.append(
+            {
+                "date": (start + timedelta(days=rng.randint(0, span))).isoformat(),
+                "duration": rng.choice([1, 1, 1, 2, 3, 5]),
+                "event": f"Generated {target}",
+                "description": f"Generated override for {target}",
+                "type": rng.choice(EVENT_TYPES),
+                "actions": [{"action": "replace", "for": audience, "with": target}],
+            }
+        )
+    events.sort(key=lambda x: x["date"])
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out", type=Path, help="directory to write the volumes files to")
+    parser.add_argument("--classes", type=int, default=500)
+    parser.add_argument("--overrides", type=int, default=5000)
+    parser.add_argument("--grades", type=int, default=6)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start, end = date(2025, 5, 12), date(2026, 3, 20)
+    info, rooms = generate_info(args.classes, args.grades)
+    places = [str(600 + x) for x in range(args.rooms)] + ["Gym", "Labwork 1", "Labwork 2"]
+    timetables = {
+        class_: {day: generate_day(rng, places) for day in WEEKDAYS}
+        for _, _, class_ in rooms
+    }
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    files = {
+        "info.json": info,
+        "timetables.json": timetables,
+        "override.json": generate_overrides(rng, args.overrides, start, end, rooms),
+        "academicInfo.json": {
+            "academicYear": {"start": start.isoformat(), "end": end.isoformat()}
+        },
+    }
+    for name, content in files.items():
+        with open(args.out / name, "w") as file:
+            file.write(json.dumps(content, indent=1))
+    for name in ("slots.json", "special.json", "resources.json"):
+        shutil.copyfile(VOLUMES_DIR / name, args.out / name)
+    print(f"Wrote {len(rooms)} classes and {args.overrides} overrides to {args.out}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Scheduler and calendar benchmarks.
+
+Usage:
+    python benchmarks/generate.py /tmp/big-school
+    python benchmarks/run.py --volumes /tmp/big-school
+
+Reports throughput and allocations for the hot scheduler/calendar paths, so
+regressions show up before they reach production.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def measure(name: str, func: Callable[[], Any], minTime: float, count: int = 1) -> None:
+    """Print ops/s plus peak KiB and live blocks allocated per op for func().
+
+    count is the number of logical operations one call of func performs.
+    Memory is measured over one call while its result is still held, so
+    cached paths that hand out stored objects show how little they allocate.
+    """
+    func()  # warm up
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= minTime:
+            break
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0
+    )
+    print(
+        f"{name:<32} {calls * count / elapsed:>14,.0f} ops/s"
+        f" {(peak - base) / 1024 / count:>10.2f} KiB/op {blocks / count:>10.1f} blocks/op"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--volumes", type=Path, help="volumes directory (default: backend/volumes)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds per benchmark")
+    args = parser.parse_args()
+    if args.volumes is not None:
+        os.environ["VOLUMES_DIR"] = str(args.volumes)
+
+    from app import volumes
+    from app.domain.common import check_tag_strong
+    from app.domain.schoolScheduler import (
+        fixed_week_schedule,
+        get_academic_info,
+        get_class,
+        get_events,
+        get_events_all,
+        list_classes,
+        prebuild,
+        week_schedule,
+    )
+    from app.domain.schoolScheduler.loader import load_event
+    from app.domain.schoolScheduler.timetable import academic_year_range
+    from app.schemas.types import Room
+
+    started = time.perf_counter()
+    snapshot = volumes.load(prebuild)
+    print(f"volumes: {volumes.VOLUMES_DIR} (version {snapshot.version})")
+    print(f"snapshot load + prebuild: {time.perf_counter() - started:.2f}s")
+
+    classes = list_classes()
+    rooms = []
+    for class_ in classes:
+        f_class = get_class(class_)
+        rooms.append(Room(f_class["year"], f_class["department"], class_))
+    events = load_event()
+    start, end = academic_year_range()
+    weeks = [start + timedelta(days=7 * x) for x in range((end - start).days // 7 + 1)]
+    outside = [date(start.year - 2, 1, 5) + timedelta(days=7 * x) for x in range(len(weeks))]
+    actions = [action for event in events for action in event["actions"]]
+    print(f"{len(rooms)} classes, {len(events)} overrides, {len(weeks)} weeks\n")
+
+    state = {"room": 0, "week": 0}
+
+    def next_room() -> Room:
+        state["room"] = (state["room"] + 1) % len(rooms)
+        return rooms[state["room"]]
+
+    def next_week(pool: list[date]) -> date:
+        state["week"] = (state["week"] + 1) % len(pool)
+        return pool[state["week"]]
+
+    measure("week_schedule (stored)", lambda: week_schedule(next_room(), next_week(weeks)), args.min_time)
+    measure("week_schedule (off-store)", lambda: week_schedule(next_room(), next_week(outside)), args.min_time)
+    measure("fixed_week_schedule", lambda: fixed_week_schedule(next_room()), args.min_time)
+    measure("get_events (class)", lambda: get_events(next_room()), args.min_time)
+    measure("get_events_all", get_events_all, args.min_time)
+    allEvents = get_events_all()
+    measure("get_academic_info", lambda: get_academic_info(allEvents), args.min_time)
+    measure(
+        "check_tag_strong",
+        lambda: [check_tag_strong(action["for"], rooms[0].toTag()) for action in actions],
+        args.min_time,
+        count=len(actions),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Validate the volumes data and compile it into one binary snapshot.
+
+Usage:
+    python compile_volumes.py          # validate and write volumes/snapshot.bin
+    python compile_volumes.py --check  # validate only
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from app import volumes
+from app.domain.schoolScheduler import prebuild, validate_volumes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--check", action="store_true", help="only validate, do not write a snapshot"
+    )
+    parser.add_argument(
+        "--volumes",
+        type=Path,
+        default=volumes.VOLUMES_DIR,
+        help="volumes directory (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    files = volumes.read_files(args.volumes)
+    problems = validate_volumes(files)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if problems:
+        print(f"{len(problems)} problem(s) found.", file=sys.stderr)
+        return 1
+    print("Volumes data is valid.")
+    if args.check:
+        return 0
+
+    snapshot = volumes.Snapshot(0, volumes.intern_strings(files))
+    with volumes.pinned(snapshot):
+        prebuild()
+    path = volumes.write_compiled(snapshot, args.volumes)
+    print(f"Wrote {path} ({path.stat().st_size} bytes).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
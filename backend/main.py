@@ -1,6 +1,7 @@
 """FastAPI application initialization and configuration."""
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,12 +11,16 @@ from app.api.routes import (
     announcements,
     auth,
     calendar,
+    events as event_routes,
+    media,
     people,
     resources,
     schedule,
 )
-from app.config import CORS_ORIGINS, logger
+from app import events, volumes
+from app.config import CORS_ORIGINS, DB_URL, EVENTS_BACKEND, logger
 from app.database import create_db_and_tables
+from app.domain.schoolScheduler import prebuild
 
 
 # Lifespan context manager for startup/shutdown events
@@ -23,8 +28,25 @@ from app.database import create_db_and_tables
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
     create_db_and_tables()
+    snapshot = volumes.load(prebuild)
+    logger.info(f"-> Volumes loaded as version {snapshot.version}.")
+    await events.start(events.create_backend(EVENTS_BACKEND, DB_URL))
+    # Every worker runs its own watcher, so schedule changes are announced
+    # to local subscribers only.
+    watcher = asyncio.create_task(
+        volumes.watch(
+            prebuild,
+            lambda snapshot: events.publish_local(
+                {"type": "schedule", "version": snapshot.digest}
+            ),
+        )
+    )
     logger.info("-> Start up server.")
     yield
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
+    await events.stop()
     logger.info("-> Shutting down server.")
 
 
@@ -53,3 +75,5 @@ app.include_router(calendar.router)
 app.include_router(schedule.router)
 app.include_router(people.router)
 app.include_router(resources.router)
+app.include_router(media.router)
+app.include_router(event_routes.router)
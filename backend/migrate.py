@@ -0,0 +1,48 @@
+"""Apply pending database schema migrations.
+
+The backend also applies them on startup; run this to migrate ahead of a
+deploy or to see what is pending.
+
+Usage:
+    python migrate.py             # apply every pending migration
+    python migrate.py --status    # list applied and pending migrations
+    python migrate.py --to 3      # apply migrations up to version 3
+"""
+
+import argparse
+import logging
+import sys
+
+from sqlmodel import SQLModel
+
+from app import migrations
+from app.database import engine
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--status", action="store_true", help="only list migrations, do not apply them"
+    )
+    parser.add_argument(
+        "--to", type=int, metavar="VERSION", help="stop after this version"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    pending = {version for version, _ in migrations.pending(engine)}
+    if args.status:
+        for version, name, _ in migrations.MIGRATIONS:
+            state = "pending" if version in pending else "applied"
+            print(f"{version:>4}  {name:<30} {state}")
+        return 0
+
+    # Tables that do not exist yet are created from the models, as on startup.
+    SQLModel.metadata.create_all(engine)
+    applied = migrations.migrate(engine, args.to)
+    print(f"Applied {len(applied)} migration(s)." if applied else "Database is up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())